@@ -0,0 +1,32 @@
+import numpy as np
+
+from engine import ROWS, COLS, PLAYER_PIECE, BOT_PIECE, WINDOWS, BB_WINDOW_SCORE
+
+#Batch versions of position_evaluation and winning_move for scoring many positions at once (e.g. offline analysis)
+#Boards come in as an (N, ROWS, COLS) array, every window of every board is gathered in one go with the
+#window table and scored with the evaluate_moves weights through a lookup on (own pieces, opponent pieces)
+WINDOW_INDEX = np.array(WINDOWS, dtype=np.intp)
+BATCH_WINDOW_SCORE = np.array(BB_WINDOW_SCORE, dtype=np.int64)
+
+#Yields the windows of the boards chunk by chunk, shape (chunk, len(WINDOWS), 4), to keep memory bounded
+def batch_windows(boards, chunk_size):
+    cells = boards.reshape(boards.shape[0], ROWS * COLS)
+    for start in range(0, cells.shape[0], chunk_size):
+        yield start, cells[start:start + chunk_size][:, WINDOW_INDEX]
+
+def batch_position_evaluation(boards, piece, chunk_size=65536):
+    boards = np.asarray(boards, dtype=np.int8)
+    opposition = PLAYER_PIECE if piece == BOT_PIECE else BOT_PIECE
+    scores = (boards[:, :, COLS // 2] == piece).sum(axis=1).astype(np.int64) * 4
+    for start, windows in batch_windows(boards, chunk_size):
+        own = (windows == piece).sum(axis=2)
+        opp = (windows == opposition).sum(axis=2)
+        scores[start:start + windows.shape[0]] += BATCH_WINDOW_SCORE[own, opp].sum(axis=1)
+    return scores
+
+def batch_winning_move(boards, piece, chunk_size=65536):
+    boards = np.asarray(boards, dtype=np.int8)
+    wins = np.zeros(boards.shape[0], dtype=bool)
+    for start, windows in batch_windows(boards, chunk_size):
+        wins[start:start + windows.shape[0]] = (windows == piece).all(axis=2).any(axis=1)
+    return wins
@@ -0,0 +1,255 @@
+#Benchmark harness for the search, the evaluation and the win checks, runs headless
+#Every number comes from the same fixed corpus of opening, midgame and endgame positions, so runs on the same
+#machine can be compared before and after a change. --json writes the results for regression tracking and
+#--baseline prints each rate as a ratio of an earlier JSON run
+#
+#python bench.py [--depth 5] [--engines minimax,bitboard] [--json out.json] [--baseline old.json]
+import argparse
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+
+from engine import (BOT_PIECE, ORDER_ALL, PLAYER_PIECE, Board, IncrementalEvaluator, Search, TranspositionTable,
+                    bb_eval_cache, bb_from_moves, bb_iterative_deepening, bb_minimax, bb_position_evaluation,
+                    bb_winning_move, bitboard_to_board, column_height, minimax, minimax_in_place, position_evaluation,
+                    winning_move, winning_move_at)
+
+try:
+    import numpy as np
+    from batch_eval import batch_position_evaluation, batch_winning_move
+except ImportError:
+    np = None
+
+#Column digits, player first, an odd number of stones so the bot is to move. None of them is decided yet
+CORPUS = {
+    "opening": ["3", "334", "33243"],
+    "midgame": ["5446132545441", "451600334234435", "43106441243004602"],
+    "endgame": ["404362465434353613515014211", "25364461644052133124242061003", "2242262333140654456236035043054"],
+}
+
+#One entry per position: (phase, moves, list board, bitboard, (row, col) of the last stone)
+def corpus_positions(corpus=CORPUS):
+    positions = []
+    for phase, games in corpus.items():
+        for moves in games:
+            bb = bb_from_moves(moves)
+            board = bitboard_to_board(bb)
+            col = int(moves[-1])
+            positions.append((phase, moves, board, bb, (column_height(board, col) - 1, col)))
+    return positions
+
+#Engines take (board, bb, depth) and return (col, score, nodes). The list engines and bb_minimax do not count nodes
+#and return None: they search exactly the same tree as the bitboard search without ordering or table,
+#so the harness takes the node count from that instead
+def run_minimax(board, bb, depth):
+    col, score = minimax([row[:] for row in board], depth, -math.inf, math.inf, True)
+    return col, score, None
+
+def run_minimax_in_place(board, bb, depth):
+    col, score = minimax_in_place([row[:] for row in board], depth, -math.inf, math.inf, True)
+    return col, score, None
+
+def run_bitboard(board, bb, depth):
+    search = Search()
+    col, score = search.minimax(bb.copy(), depth, -math.inf, math.inf, True)
+    return col, score, search.nodes
+
+def run_bitboard_fast(board, bb, depth):
+    col, score = bb_minimax(bb.copy(), depth, -math.inf, math.inf, True)
+    return col, score, None
+
+def run_bitboard_threats(board, bb, depth):
+    search = Search(threats=True)
+    col, score = search.minimax(bb.copy(), depth, -math.inf, math.inf, True)
+    return col, score, search.nodes
+
+def run_bitboard_tt(board, bb, depth):
+    search = Search(TranspositionTable(1 << 16), ordering=ORDER_ALL)
+    col, score = search.minimax(bb.copy(), depth, -math.inf, math.inf, True)
+    return col, score, search.nodes
+
+def run_iterative(board, bb, depth):
+    col, score, info = bb_iterative_deepening(bb.copy(), 10 ** 9, TranspositionTable(1 << 16), max_depth=depth)
+    return col, score, info["nodes"]
+
+#New engines only need an entry here to show up in the comparison
+ENGINES = {
+    "minimax": run_minimax,
+    "minimax_in_place": run_minimax_in_place,
+    "bitboard": run_bitboard,
+    "bitboard_fast": run_bitboard_fast,
+    "bitboard_threats": run_bitboard_threats,
+    "bitboard_tt": run_bitboard_tt,
+    "iterative": run_iterative,
+}
+
+def reference_nodes(bb, depth):
+    return run_bitboard(None, bb, depth)[2]
+
+#Searches every position at depth 1, 2, ... depth from scratch. Returns per phase the time to each depth
+#(summed over the positions of the phase) and the nodes and nodes/s of the deepest search
+def bench_engine(run, positions, depth):
+    phases = {}
+    for phase, moves, board, bb, _ in positions:
+        result = phases.setdefault(phase, {"time_to_depth_ms": {}, "nodes": 0, "time_s": 0.0})
+        for d in range(1, depth + 1):
+            #Leaf scores cached by an earlier run would make this one faster than it is on its own
+            bb_eval_cache.clear()
+            start = time.perf_counter()
+            _, _, nodes = run(board, bb, d)
+            elapsed = time.perf_counter() - start
+            times = result["time_to_depth_ms"]
+            times[d] = times.get(d, 0.0) + elapsed * 1000
+            if d == depth:
+                result["nodes"] += nodes if nodes is not None else reference_nodes(bb, d)
+                result["time_s"] += elapsed
+    for result in phases.values():
+        result["nodes_per_s"] = result["nodes"] / result["time_s"] if result["time_s"] else 0.0
+    return phases
+
+#Calls per second of fn over items, repeated until at least min_time seconds have passed
+def rate(fn, items, min_time=0.2):
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        for item in items:
+            fn(item)
+        calls += len(items)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return calls / elapsed
+
+def incremental_step(item):
+    evaluator, (row, col) = item
+    evaluator.undo(row, col, PLAYER_PIECE)
+    evaluator.score(BOT_PIECE)
+    evaluator.play(row, col, PLAYER_PIECE)
+
+#Leaf evaluations per second for every evaluator
+def bench_evaluation(positions, min_time=0.2):
+    boards = [board for _, _, board, _, _ in positions]
+    bbs = [bb for _, _, _, bb, _ in positions]
+    steps = [(IncrementalEvaluator(board), last) for _, _, board, _, last in positions]
+    results = {
+        "position_evaluation": rate(lambda board: position_evaluation(board, BOT_PIECE), boards, min_time),
+        "bb_position_evaluation": rate(lambda bb: bb_position_evaluation(bb, BOT_PIECE), bbs, min_time),
+        #An incremental evaluation is paid for in the undo and play around it
+        "incremental_undo_score_play": rate(incremental_step, steps, min_time),
+    }
+    if np is not None:
+        batch = np.array(boards * (10000 // len(boards)), dtype=np.int8)
+        results["batch_position_evaluation"] = len(batch) * rate(lambda b: batch_position_evaluation(b, BOT_PIECE), [batch], min_time)
+    return results
+
+#Win checks per second for every way of detecting four in a row
+def bench_win_checks(positions, min_time=0.2):
+    boards = [board for _, _, board, _, _ in positions]
+    bbs = [bb for _, _, _, bb, _ in positions]
+    lasts = [(board, last) for _, _, board, _, last in positions]
+    results = {
+        "winning_move": rate(lambda board: winning_move(board, PLAYER_PIECE), boards, min_time),
+        "winning_move_at": rate(lambda item: winning_move_at(item[0], item[1][0], item[1][1], PLAYER_PIECE), lasts, min_time),
+        "bb_winning_move": rate(lambda bb: bb_winning_move(bb, PLAYER_PIECE), bbs, min_time),
+    }
+    if np is not None:
+        batch = np.array(boards * (10000 // len(boards)), dtype=np.int8)
+        results["batch_winning_move"] = len(batch) * rate(lambda b: batch_winning_move(b, PLAYER_PIECE), [batch], min_time)
+    return results
+
+#Bytes allocated per copy of one position (measured over many copies) and copies per second
+#for the nested lists, the Board class and the bitboard
+def bench_boards(positions, min_time=0.2, copies=1000):
+    copiers = {
+        "list": (lambda board: [row[:] for row in board], [board for _, _, board, _, _ in positions]),
+        "Board": (Board.copy, [Board.from_list(board) for _, _, board, _, _ in positions]),
+        "BitBoard": (lambda bb: bb.copy(), [bb for _, _, _, bb, _ in positions]),
+    }
+    results = {}
+    for name, (copy, items) in copiers.items():
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        kept = [copy(items[i % len(items)]) for i in range(copies)]
+        size = (tracemalloc.get_traced_memory()[0] - before) / copies
+        tracemalloc.stop()
+        del kept
+        results[name] = {"bytes": size, "copies_per_s": rate(copy, items, min_time)}
+    return results
+
+def run_benchmarks(depth=5, engines=None, min_time=0.2):
+    positions = corpus_positions()
+    engines = engines or list(ENGINES)
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "depth": depth,
+        "corpus": CORPUS,
+        "search": {name: bench_engine(ENGINES[name], positions, depth) for name in engines},
+        "evaluation": bench_evaluation(positions, min_time),
+        "win_checks": bench_win_checks(positions, min_time),
+        "boards": bench_boards(positions, min_time),
+    }
+
+#Prints rates side by side, with the ratio to the baseline run when there is one
+def report(results, baseline=None):
+    def ratio(section, *path):
+        value = baseline.get(section) if baseline else None
+        for key in path:
+            if not isinstance(value, dict):
+                return ""
+            value = value.get(key)
+        current = results[section]
+        for key in path:
+            current = current[key]
+        return "  x%.2f" % (current / value) if value else ""
+
+    depth = results["depth"]
+    if baseline and baseline.get("depth") != depth:
+        print("note: the baseline searched to depth %s, the search ratios compare different trees" % baseline.get("depth"))
+    print("search, depth %d (time to depth in ms, nodes/s at depth %d)" % (depth, depth))
+    for name, phases in results["search"].items():
+        for phase, result in phases.items():
+            times = " ".join("%.1f" % result["time_to_depth_ms"][d] for d in range(1, depth + 1))
+            print("  %-17s %-8s %10.0f nodes/s%s  [%s]" % (name, phase, result["nodes_per_s"],
+                                                           ratio("search", name, phase, "nodes_per_s"), times))
+    for section, unit in (("evaluation", "evals/s"), ("win_checks", "checks/s")):
+        print(section)
+        for name, value in results[section].items():
+            print("  %-28s %12.0f %s%s" % (name, value, unit, ratio(section, name)))
+    print("boards (bytes per copy, copies/s)")
+    for name, result in results["boards"].items():
+        print("  %-28s %12.0f bytes %12.0f copies/s%s" % (name, result["bytes"], result["copies_per_s"],
+                                                          ratio("boards", name, "copies_per_s")))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Connect 4 engines")
+    parser.add_argument("--depth", type=int, default=5, help="deepest search depth")
+    parser.add_argument("--engines", default=",".join(ENGINES), help="comma separated engine names")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds spent on each rate measurement")
+    parser.add_argument("--json", help="write the results to this file (- for stdout)")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    engines = [name for name in args.engines.split(",") if name]
+    unknown = [name for name in engines if name not in ENGINES]
+    if unknown:
+        parser.error("unknown engines: %s (known: %s)" % (", ".join(unknown), ", ".join(ENGINES)))
+
+    results = run_benchmarks(args.depth, engines, args.min_time)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    if args.json == "-":
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        report(results, baseline)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#Opening book: solved results for every position up to a given ply, stored in a compact sorted binary file
+#
+#The file is a 16 byte header followed by one little-endian 64-bit record per position, sorted by key:
+#key << 10 | (score + 64) << 3 | best column, where key is the solver key (stones of the player to move + mask)
+#and score is the solver score for the player to move. Mirror images share one record: the key is the smaller of
+#the key and the mirrored key and the column is for that orientation, lookup mirrors it back when needed. Records are looked up by binary search straight in a
+#read-only mmap of the file, so opening a book costs the same whatever its size and every process using the
+#same book shares its pages through the page cache.
+#
+#Generating a book: python book.py --root MOVES --ply 3 --out book.bin
+#MOVES (column digits) is the position the enumeration starts from. Only the positions --ply moves past it are
+#solved with solver.py, the shallower ones are backed up from their children. The pure Python solver needs
+#seconds to minutes per position with fewer than about 12 stones, so the root has to be well into the game:
+#--root 4344332256 --ply 3 (288 positions, 10 to 13 stones) takes about 40 s. A book from the empty board
+#is out of reach this way
+import argparse
+import mmap
+import struct
+import sys
+import time
+
+from engine import (CENTER_ORDER, COLS, ROWS, bb_alignment, bb_drop_piece, bb_from_moves, bb_is_valid_location,
+                    bb_mover_key, mirror_col)
+from solver import Solver
+
+MAGIC = b"C4BK"
+VERSION = 2
+HEADER = struct.Struct("<4sHBBII")  # magic, version, rows, cols, plies, record count
+RECORD = struct.Struct("<Q")
+
+def pack_record(key, score, col):
+    return (key << 10) | ((score + 64) << 3) | col
+
+def unpack_record(record):
+    return record >> 10, ((record >> 3) & 127) - 64, record & 7
+
+#Every position reachable from root in at most plies moves where the game is still going, one per canonical key.
+#Returns one dict (canonical key -> position) per ply, the root's first
+def enumerate_levels(root, plies):
+    if bb_alignment(root.current ^ root.mask) or root.moves == ROWS * COLS:
+        return []
+    levels = [{bb_mover_key(root.current, root.mask)[0]: root}]
+    for _ in range(plies):
+        next_level = {}
+        for bb in levels[-1].values():
+            for col in range(COLS):
+                if not bb_is_valid_location(bb, col):
+                    continue
+                child = bb.copy()
+                bb_drop_piece(child, col)
+                #Skip finished games: the player who just moved has four in a row or the board is full
+                if bb_alignment(child.current ^ child.mask) or child.moves == ROWS * COLS:
+                    continue
+                next_level.setdefault(bb_mover_key(child.current, child.mask)[0], child)
+        levels.append(next_level)
+    return levels
+
+def enumerate_positions(root, plies):
+    return [bb for level in enumerate_levels(root, plies) for bb in level.values()]
+
+#Best column and score of a position whose children are all in scores (canonical key -> score) or end the game:
+#negamax over the book, center columns first on ties like Solver.best_move
+def backed_up_move(bb, scores):
+    best_col, best_score = None, None
+    for col in CENTER_ORDER:
+        if not bb_is_valid_location(bb, col):
+            continue
+        child = bb.copy()
+        bb_drop_piece(child, col)
+        if bb_alignment(child.current ^ child.mask):
+            score = (ROWS * COLS + 1 - bb.moves) // 2
+        elif child.moves == ROWS * COLS:
+            score = 0
+        else:
+            score = -scores[bb_mover_key(child.current, child.mask)[0]]
+        if best_score is None or score > best_score:
+            best_col, best_score = col, score
+    return best_col, best_score
+
+#Solves every position and writes the book, returns the number of records.
+#Only the positions plies moves past the root are solved, every shallower position (the expensive ones for
+#the solver) takes its score from its children, so the deepest level sets the cost of a build
+def build_book(path, plies, root_moves="", progress=None):
+    levels = enumerate_levels(bb_from_moves(root_moves), plies)
+    total = sum(len(level) for level in levels)
+    solver = Solver()
+    scores = {}
+    records = []
+    for ply in reversed(range(len(levels))):
+        for key, bb in levels[ply].items():
+            if ply == plies:
+                col, score = solver.best_move(bb)
+            else:
+                col, score = backed_up_move(bb, scores)
+            scores[key] = score
+            records.append(pack_record(key, score, mirror_col(col) if bb_mover_key(bb.current, bb.mask)[1] else col))
+            if progress is not None:
+                progress(len(records), total)
+    records.sort()
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, ROWS, COLS, plies, len(records)))
+        for record in records:
+            f.write(RECORD.pack(record))
+    return len(records)
+
+class OpeningBook:
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, rows, cols, self.plies, self.count = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError("Not an opening book: " + path)
+        if (rows, cols) != (ROWS, COLS):
+            self.close()
+            raise ValueError("Opening book is for a %dx%d board" % (rows, cols))
+        if HEADER.size + self.count * RECORD.size > len(self.mm):
+            self.close()
+            raise ValueError("Truncated opening book: " + path)
+
+    def __len__(self):
+        return self.count
+
+    def _key_at(self, i):
+        return RECORD.unpack_from(self.mm, HEADER.size + i * RECORD.size)[0] >> 10
+
+    #(best column, score) for the player to move in bb, or None if the position is not in the book
+    def lookup(self, bb):
+        key, mirrored = bb_mover_key(bb.current, bb.mask)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count:
+            record = RECORD.unpack_from(self.mm, HEADER.size + lo * RECORD.size)[0]
+            found, score, col = unpack_record(record)
+            if found == key:
+                return (mirror_col(col) if mirrored else col), score
+        return None
+
+    def close(self):
+        self.mm.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a Connect 4 opening book")
+    parser.add_argument("--root", required=True, help="column digits of the position to start from")
+    parser.add_argument("--ply", type=int, default=3, help="cover every position up to this many moves past the root")
+    parser.add_argument("--out", default="book.bin", help="output file")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    def progress(done, total):
+        if done == total or done % 100 == 0:
+            print("\r%d/%d positions, %.0fs" % (done, total, time.perf_counter() - start), end="", file=sys.stderr)
+    count = build_book(args.out, args.ply, args.root, progress)
+    print(file=sys.stderr)
+    print("wrote %d positions to %s" % (count, args.out))
+
+if __name__ == "__main__":
+    main()
@@ -1,151 +1,39 @@
+import concurrent.futures
+import os
 import pygame
 import sys
-import numpy as np
-import copy
+import time
+from pygame import gfxdraw
 
-pygame.init()
+from engine import ROWS, COLS, create_board, bot_move, drop_piece, is_valid_location, get_next_open_row, winning_move_at
 
 #Basic implementation of Connect 4 parameters in PyGame
+#The game logic and the bot live in engine.py, this file only draws the board and runs the game loop
 WIDTH, HEIGHT = 700, 700  # Height increased to add a top row for drop selection
-ROWS, COLS = 6, 7
 SQUARE_SIZE = 100
 RADIUS = SQUARE_SIZE // 2 - 5
-board = [[0 for _ in range(COLS)] for _ in range(ROWS)]
-PLAYER_PIECE = 1
-BOT_PIECE = 2
-
-#Evaluation function used to get a simple score from board positions
-#Strategy: the bot scores the middle of the board higher than other sections
-def position_evaluation(board, piece):
-    score = 0
-
-    #Added a 4 point weight to the center of the board
-    c_arr = [int(board[i][COLS//2]) for i in range(ROWS)]
-    c_count = c_arr.count(piece)
-    score += c_count * 4
-    
-    #Horizontal scoring
-    for h in range(ROWS):
-        h_array = [int(board[h][c]) for c in range(COLS)]
-        for c in range(COLS - 3):
-            tally = h_array[c:c + 4]
-            score += evaluate_moves(tally, piece)
-    #Vertical Scoring
-    for v in range(COLS):
-        v_array = [int(board[r][v]) for r in range(ROWS)]
-        for r in range(ROWS - 3):
-            tally = v_array[v:v + 4]
-            score += evaluate_moves(tally, piece)
-    #Score Diagonal
-    for r in range(ROWS - 3):
-        for c in range(COLS - 3):
-            tally = [board[r+i][c+i] for i in range(4)]
-            score += evaluate_moves(tally, piece)
-    for r in range(ROWS - 3):
-        for c in range(COLS - 3):
-            tally = [board[r + 3 - i][c + i] for i in range(4)]
-            score += evaluate_moves(tally, piece)
-    return score
-
-#This function evaluates the specific moves on the board
-#Implementation is fairly simple, the more pieces it can line up in a row, the higher the score
-#Similarly, if it sees a winning move or nearly a winning move, it looks to block that move
-def evaluate_moves(block, piece):
-    score = 0
-
-    if piece == BOT_PIECE:
-        opposition = PLAYER_PIECE
-    else:
-        opposition = BOT_PIECE
-    
-    #Bot sees a winning move
-    if block.count(piece) == 4:
-        score += 50
-    #Bot sees a move where it can win on its next move
-    elif block.count(piece) == 3 and block.count(0) == 1:
-        score += 6
-    #Bot sees this favorably
-    elif block.count(piece) == 2 and block.count(0) == 2:
-        score += 3
-    #Bot sees an opponents winning move
-    if block.count(opposition) == 3 and block.count(0) == 1:
-        score -= 8
-
-    return score
-    
-#Main minimax function to search the tree for plays
-def minimax(board, depth, alpha, beta, is_max):
-    #Checks all potential moves, basically every column available
-    all_plays = [p for p in range(COLS) if is_valid_location(board, p)]
-    end_of_game = winning_move(board, BOT_PIECE) or winning_move(board, PLAYER_PIECE) or len(all_plays) == 0
-
-    if depth == 0 or end_of_game:
-        if end_of_game:
-            #Using an arbitrary number to determine outcome, in this case I just used the current episode count of One Piece times 100
-            if winning_move(board, BOT_PIECE):
-                return None, 112400
-            elif winning_move(board, PLAYER_PIECE):
-                return None, -112400
-            else:
-                return None, 0
-        else:
-            return None, position_evaluation(board, BOT_PIECE)
-        
-    #Maximizing
-    if is_max:
-        v = -np.inf
-        best_col = all_plays[0]
-        for c in all_plays:
-            row = get_next_open_row(board, c)
-            temp_board = copy.deepcopy(board)
-            drop_piece(temp_board, row, c, BOT_PIECE)
-            ingest_score = minimax(temp_board, depth - 1, alpha, beta, False)[1]
-            if ingest_score > v:
-                v = ingest_score
-                best_col = c
-            alpha = max(alpha, v)
-            if alpha >= beta:
-                break
-        return best_col, v
-
-    #Minimizing
-    else:
-        v = np.inf
-        best_col = all_plays[0]
-        for c in all_plays:
-            row = get_next_open_row(board, c)
-            temp_board = copy.deepcopy(board)
-            drop_piece(temp_board, row, c, PLAYER_PIECE)
-            ingest_score = minimax(temp_board, depth - 1, alpha, beta, True)[1]
-            if ingest_score < v:
-                v = ingest_score
-                best_col = c
-            beta = min(beta, v)
-            if alpha >= beta:
-                break
-        return best_col, v
-        
-def bot_move(board):
-    #Maximum depth can be adjusted to allow the tree to search deeper
-    #4 is currently the best sweet spot but we can make some optimizations if needed
-    max_depth = 4
-    col, _ = minimax(board, max_depth, -np.inf, np.inf, True)
-    return col
-
 
 # Colors
 RED = (255, 0, 0)
 YELLOW = (255, 255, 0)
+DARK_YELLOW = (90, 90, 0)
 BLUE = (0, 0, 255)
 BLACK = (0, 0, 0)
 
-# Initialize the screen
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Connect 4")
+#Time the bot may think per move (None searches the fixed depth of bot_move). The search runs in a worker
+#process, so the window keeps responding however long it takes
+BOT_TIME_BUDGET_MS = None
+
+#Pondering: during the human's turn the bot already searches its reply to every move the human can make,
+#the hovered column first, so the reply is ready (or under way) by the time the human drops a piece
+PONDER = True
+WORKERS = max(1, min(COLS, (os.cpu_count() or 1) - 1))
 
-# Create the board
+#The loop draws at most FPS frames a second while something moves on screen and sleeps in
+#pygame.event.wait when nothing does, so an idle window leaves the CPU to the search
+FPS = 60
 
-def draw_board():
+def draw_board(screen, board):
     screen.fill(BLACK)  # Fill background with black
     for row in range(ROWS):
         for col in range(COLS):
@@ -161,72 +49,233 @@ def draw_board():
                 pygame.draw.circle(screen, YELLOW, (col * SQUARE_SIZE + SQUARE_SIZE // 2, HEIGHT - (row * SQUARE_SIZE + SQUARE_SIZE // 2)), RADIUS)
     pygame.display.update()
 
-def drop_piece(board, row, col, piece):
-    board[row][col] = piece
-
-# Function for the bot to drop pieces into a copy of the board for the minimax function
-# Deprecated 
-#def bot_drop_piece(board, row, col, piece):
-#    b_board = board.copy()
-#    b_board[row][col] = piece
-
-def is_valid_location(board, col):
-    return board[ROWS - 1][col] == 0
-
-def get_next_open_row(board, col):
-    for r in range(ROWS):
-        if board[r][col] == 0:
-            return r
-
-#Simple check for a winning move
-def winning_move(board, piece):
-    # Check horizontal locations
-    for c in range(COLS - 3):
-        for r in range(ROWS):
-            if board[r][c] == piece and board[r][c + 1] == piece and board[r][c + 2] == piece and board[r][c + 3] == piece:
-                return True
-
-    # Check vertical locations
-    for c in range(COLS):
-        for r in range(ROWS - 3):
-            if board[r][c] == piece and board[r + 1][c] == piece and board[r + 2][c] == piece and board[r + 3][c] == piece:
-                return True
-
-    # Check positively sloped diagonals
-    for c in range(COLS - 3):
-        for r in range(ROWS - 3):
-            if board[r][c] == piece and board[r + 1][c + 1] == piece and board[r + 2][c + 2] == piece and board[r + 3][c + 3] == piece:
-                return True
-
-    # Check negatively sloped diagonals
-    for c in range(COLS - 3):
-        for r in range(3, ROWS):
-            if board[r][c] == piece and board[r - 1][c + 1] == piece and board[r - 2][c + 2] == piece and board[r - 3][c + 3] == piece:
-                return True
-        
- # Main game loop
-game_over = False
-turn = 0  # 0 for Player 1 (RED), 1 for Player 2 (YELLOW)
-
-draw_board()  # Initial draw
-
-while not game_over:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            pygame.quit()
-            sys.exit()
-
-        if event.type == pygame.MOUSEMOTION:
-            pygame.draw.rect(screen, BLACK, (0, 0, WIDTH, SQUARE_SIZE))
-            pos_x = event.pos[0]
-            if turn == 0:
-                pygame.draw.circle(screen, RED, (pos_x, SQUARE_SIZE // 2), RADIUS)
-            pygame.display.update()
-
-        if event.type == pygame.MOUSEBUTTONDOWN:
-            pygame.draw.rect(screen, BLACK, (0, 0, WIDTH, SQUARE_SIZE))
-            # Player 1 Input
-            if turn == 0:
+PIECE_COLORS = {1: RED, 2: YELLOW}
+STRIP = pygame.Rect(0, 0, WIDTH, SQUARE_SIZE)
+
+#Falling pieces accelerate at DROP_ACCEL pixels/s^2 from the top row, about 0.5s to the bottom row
+DROP_ACCEL = 5000
+
+#Screen rectangle of board[row][col], row 0 is the bottom row
+def cell_rect(row, col):
+    return pygame.Rect(col * SQUARE_SIZE, HEIGHT - (row + 1) * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE)
+
+#Antialiased piece drawn once into a transparent Surface, every frame after that is a blit
+def make_piece_sprite(color):
+    size = 2 * RADIUS + 2
+    sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+    gfxdraw.filled_circle(sprite, size // 2, size // 2, RADIUS, color)
+    gfxdraw.aacircle(sprite, size // 2, size // 2, RADIUS, color)
+    return sprite.convert_alpha()
+
+#Incremental renderer: the blue grid with its holes is drawn once into a Surface and the pieces are
+#pre-rendered sprites, after that only the cells that changed since the last frame, falling pieces and
+#the hover piece are redrawn, and only their rectangles are sent to pygame.display.update.
+#Every draw method returns the rectangles it touched for present().
+#New pieces can fall into place instead of appearing: update_board(animate=True) queues them and animate(),
+#called once per frame, moves the first one in the queue along, so a piece only starts once the one before
+#it has landed. Nothing blocks, the game loop keeps handling events between frames.
+#frame_times collects how long each presented frame took, by kind ("move", "motion", "drop")
+class Renderer:
+    def __init__(self, screen):
+        self.screen = screen
+        self.grid = pygame.Surface((WIDTH, HEIGHT - SQUARE_SIZE))
+        self.grid.fill(BLUE)
+        for row in range(ROWS):
+            for col in range(COLS):
+                pygame.draw.circle(self.grid, BLACK, cell_rect(row, col).move(0, -SQUARE_SIZE).center, RADIUS)
+        self.grid = self.grid.convert()
+        self.sprites = {piece: make_piece_sprite(color) for piece, color in PIECE_COLORS.items()}
+        self.shown = create_board()
+        self.hover_rect = None
+        self.hover_sprite = None
+        self.falling = []  # [row, col, piece, start ticks or None, rect drawn last frame or None]
+        self.frame_times = {}
+
+    @property
+    def animating(self):
+        return bool(self.falling)
+
+    #Everything from scratch, for the first frame
+    def draw_all(self, board):
+        self.screen.fill(BLACK)
+        self.screen.blit(self.grid, (0, SQUARE_SIZE))
+        self.shown = create_board()
+        self.hover_rect = None
+        self.falling = []
+        self.update_board(board)
+        pygame.display.update()
+
+    #Puts back the empty background (top row or grid) under rect
+    def restore(self, rect):
+        self.screen.fill(BLACK, rect.clip(STRIP))
+        below = rect.clip(pygame.Rect(0, SQUARE_SIZE, WIDTH, HEIGHT - SQUARE_SIZE))
+        if below.height:
+            self.screen.blit(self.grid, below, below.move(0, -SQUARE_SIZE))
+
+    #Restores the hole of one cell from the grid and draws its piece
+    def draw_cell(self, row, col, piece):
+        rect = cell_rect(row, col)
+        self.screen.blit(self.grid, rect, rect.move(0, -SQUARE_SIZE))
+        if piece:
+            self.screen.blit(self.sprites[piece], self.sprites[piece].get_rect(center=rect.center))
+        return rect
+
+    #Redraws the cells where board differs from what is on screen, new pieces fall in when animate is set
+    def update_board(self, board, animate=False):
+        rects = []
+        queued = {(row, col) for row, col, _, _, _ in self.falling}
+        for row in range(ROWS):
+            for col in range(COLS):
+                if board[row][col] != self.shown[row][col] and (row, col) not in queued:
+                    if animate and board[row][col] and not self.shown[row][col]:
+                        self.falling.append([row, col, board[row][col], None, None])
+                    else:
+                        rects.append(self.draw_cell(row, col, board[row][col]))
+                        self.shown[row][col] = board[row][col]
+        return rects
+
+    #One frame of the falling piece at the head of the queue, ticks is pygame.time.get_ticks()
+    def animate(self, ticks):
+        if not self.falling:
+            return []
+        anim = self.falling[0]
+        row, col, piece, start, last = anim
+        if start is None:
+            start = anim[3] = ticks
+        rects = []
+        if last is not None:
+            self.restore(last)
+            rects.append(last)
+        target = cell_rect(row, col).centery
+        t = (ticks - start) / 1000
+        y = SQUARE_SIZE // 2 + 0.5 * DROP_ACCEL * t * t
+        if y >= target:
+            rects.append(self.draw_cell(row, col, piece))
+            self.shown[row][col] = piece
+            self.falling.pop(0)
+        else:
+            sprite = self.sprites[piece]
+            anim[4] = sprite.get_rect(center=(col * SQUARE_SIZE + SQUARE_SIZE // 2, int(y)))
+            self.screen.blit(sprite, anim[4])
+            rects.append(anim[4])
+        #The hover piece shares the top row with a piece starting to fall, keep it on top
+        if self.hover_rect is not None and any(self.hover_rect.colliderect(r) for r in rects):
+            self.screen.fill(BLACK, self.hover_rect)
+            self.screen.blit(self.hover_sprite, self.hover_rect)
+            rects.append(self.hover_rect)
+        return rects
+
+    #Moves the hover piece in the top row to x, None just removes it
+    def draw_hover(self, x, piece=1):
+        rects = []
+        if self.hover_rect is not None:
+            self.screen.fill(BLACK, self.hover_rect)
+            rects.append(self.hover_rect)
+            self.hover_rect = None
+        if x is not None:
+            self.hover_sprite = self.sprites[piece]
+            self.hover_rect = self.hover_sprite.get_rect(center=(x, SQUARE_SIZE // 2))
+            self.screen.blit(self.hover_sprite, self.hover_rect)
+            rects.append(self.hover_rect)
+        return rects
+
+    #Thinking indicator in the top row: three dots with a bright one moving along
+    def draw_thinking(self, phase):
+        self.screen.fill(BLACK, STRIP)
+        self.hover_rect = None
+        for i in range(3):
+            pygame.draw.circle(self.screen, YELLOW if i == phase else DARK_YELLOW, (WIDTH // 2 + (i - 1) * 40, SQUARE_SIZE // 2), 10)
+        return [STRIP]
+
+    #Pushes the rectangles to the window, start (a time.perf_counter value) times the frame under kind
+    def present(self, rects, kind=None, start=None):
+        if rects:
+            pygame.display.update(rects)
+        if kind is not None:
+            self.frame_times.setdefault(kind, []).append(time.perf_counter() - start)
+
+    def frame_report(self):
+        return {kind: (len(times), 1000 * sum(times) / len(times)) for kind, times in self.frame_times.items() if times}
+
+#Columns to ponder, the hovered one first and then from the middle out since those are the likely moves
+def ponder_order(hover_col):
+    return sorted(range(COLS), key=lambda c: (c != hover_col, abs(c - COLS // 2)))
+
+#Makes sure replies (column -> future of the bot's reply) covers every human move in the order of hover_col.
+#Replies that have not started yet are cancelled and queued again, so a new hover column jumps the queue
+def ponder(executor, board, replies, hover_col):
+    order = [c for c in ponder_order(hover_col) if is_valid_location(board, c)]
+    for c in order:
+        if c in replies and replies[c].cancel():
+            del replies[c]
+    for c in order:
+        if c not in replies:
+            after = [row[:] for row in board]
+            drop_piece(after, get_next_open_row(after, c), c, 1)
+            replies[c] = executor.submit(bot_move, after, BOT_TIME_BUDGET_MS)
+
+#Drops every reply that is no longer needed, the ones already running just finish in the background
+def stop_pondering(replies):
+    for future in replies.values():
+        future.cancel()
+    replies.clear()
+
+#Prints the average frame time of every kind of frame the renderer presented
+def print_frame_times(renderer):
+    for kind, (frames, ms) in sorted(renderer.frame_report().items()):
+        print("%-8s %5d frames %8.3fms" % (kind, frames, ms))
+
+def main(frame_times=False):
+    pygame.init()
+
+    # Initialize the screen
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Connect 4")
+    renderer = Renderer(screen)
+
+    # Create the board
+    board = create_board()
+
+    # Main game loop
+    game_over = False
+    turn = 0  # 0 for Player 1 (RED), 1 for Player 2 (YELLOW)
+
+    renderer.draw_all(board)  # Initial draw
+
+    #The bot searches in separate processes while this loop keeps handling events and drawing
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=WORKERS)
+    bot_future = None
+    thinking_phase = None
+    replies = {}
+    hover_x = None
+    hover_col = COLS // 2
+    if PONDER:
+        ponder(executor, board, replies, hover_col)
+
+    clock = pygame.time.Clock()
+    while not game_over:
+        if bot_future is None and not renderer.animating:
+            #Nothing to animate: block until the next event
+            events = [pygame.event.wait()] + pygame.event.get()
+        else:
+            events = pygame.event.get()
+        #Only the last mouse position of the frame matters, so all the motion events are handled as one
+        motion = None
+        for event in events:
+            if event.type == pygame.QUIT:
+                stop_pondering(replies)
+                executor.shutdown(wait=False, cancel_futures=True)
+                pygame.quit()
+                if frame_times:
+                    print_frame_times(renderer)
+                sys.exit()
+
+            if event.type == pygame.MOUSEMOTION:
+                motion = event
+
+            if event.type == pygame.MOUSEBUTTONDOWN and turn == 0:
+                start = time.perf_counter()
+                # Player 1 Input
                 pos_x = event.pos[0]
                 col = pos_x // SQUARE_SIZE
 
@@ -234,33 +283,151 @@ while not game_over:
                     row = get_next_open_row(board, col)
                     drop_piece(board, row, col, 1)
 
-                    if winning_move(board, 1):
+                    if winning_move_at(board, row, col, 1):
                         print("Player 1 wins!")
                         game_over = True
-
-                else:
-                    continue
-
-
-            # Player 2 Input
-            else:
-                bot_col = bot_move(board)
-                if is_valid_location(board, bot_col):
-                    bot_row = get_next_open_row(board, bot_col)
-                    drop_piece(board, bot_row, bot_col, 2)
-                    
-                    if winning_move(board, 2):
-                        print("Player 2 wins!")
+                    elif not any(is_valid_location(board, c) for c in range(COLS)):
+                        print("Draw!")
                         game_over = True
 
                 else:
                     continue
 
-            draw_board()
+                renderer.present(renderer.draw_hover(None) + renderer.update_board(board, animate=True), "move", start)
 
-            # Switch turn
-            turn += 1
-            turn %= 2
-
-            if game_over:
-                pygame.time.wait(3000)
+                # Switch turn, the bot starts thinking right away unless it already has (see ponder).
+                # Once the game is over every pondered reply is dropped, they were searched on a finished board
+                turn = 1
+                if game_over:
+                    stop_pondering(replies)
+                else:
+                    bot_future = replies.pop(col, None)
+                    stop_pondering(replies)
+                    if bot_future is None:
+                        bot_future = executor.submit(bot_move, board, BOT_TIME_BUDGET_MS)
+                    thinking_phase = None
+
+        if motion is not None:
+            start = time.perf_counter()
+            hover_x = motion.pos[0]
+            if turn == 0:
+                renderer.present(renderer.draw_hover(hover_x), "motion", start)
+                if PONDER and min(hover_x // SQUARE_SIZE, COLS - 1) != hover_col:
+                    hover_col = min(hover_x // SQUARE_SIZE, COLS - 1)
+                    ponder(executor, board, replies, hover_col)
+
+        if renderer.animating:
+            start = time.perf_counter()
+            renderer.present(renderer.animate(pygame.time.get_ticks()), "drop", start)
+            thinking_phase = None
+
+        # Player 2 Input, applied once the search is done
+        if bot_future is not None:
+            if not bot_future.done():
+                if not renderer.animating and pygame.time.get_ticks() // 250 % 3 != thinking_phase:
+                    thinking_phase = pygame.time.get_ticks() // 250 % 3
+                    renderer.present(renderer.draw_thinking(thinking_phase))
+                clock.tick(FPS)
+                continue
+
+            start = time.perf_counter()
+            bot_col = bot_future.result()
+            bot_future = None
+            #bot_move has no move for a finished game, never drop into a missing or full column
+            if bot_col is None or not is_valid_location(board, bot_col):
+                print("Bot returned no valid move")
+                game_over = True
+                break
+            bot_row = get_next_open_row(board, bot_col)
+            drop_piece(board, bot_row, bot_col, 2)
+
+            if winning_move_at(board, bot_row, bot_col, 2):
+                print("Player 2 wins!")
+                game_over = True
+            elif not any(is_valid_location(board, c) for c in range(COLS)):
+                print("Draw!")
+                game_over = True
+
+            #Clear the thinking indicator and put the hover piece back where the mouse is
+            rects = [STRIP] + renderer.update_board(board, animate=True)
+            renderer.screen.fill(BLACK, STRIP)
+            renderer.hover_rect = None
+            turn = 0
+            if hover_x is not None and not game_over:
+                renderer.draw_hover(hover_x)
+            renderer.present(rects, "move", start)
+
+            if PONDER and not game_over:
+                ponder(executor, board, replies, hover_col)
+
+        clock.tick(FPS)
+
+    #Let the last piece land before the pause on the final position
+    while renderer.animating:
+        pygame.event.pump()
+        renderer.present(renderer.animate(pygame.time.get_ticks()))
+        clock.tick(FPS)
+    pygame.time.wait(3000)
+
+    stop_pondering(replies)
+    executor.shutdown()
+    if frame_times:
+        print_frame_times(renderer)
+
+#Frame times of the full redraw (draw_board, and a full update per mouse motion like the game used to do)
+#against the Renderer, over the same moves and mouse positions. Works headless with SDL_VIDEODRIVER=dummy
+def benchmark_rendering(moves="3324152434", motions=500):
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    renderer = Renderer(screen)
+    results = {}
+
+    board = create_board()
+    start = time.perf_counter()
+    for i, ch in enumerate(moves):
+        col = int(ch)
+        drop_piece(board, get_next_open_row(board, col), col, 1 + i % 2)
+        draw_board(screen, board)
+    results["full redraw, move"] = (time.perf_counter() - start) / len(moves)
+    start = time.perf_counter()
+    for i in range(motions):
+        pygame.draw.rect(screen, BLACK, (0, 0, WIDTH, SQUARE_SIZE))
+        pygame.draw.circle(screen, RED, (i % WIDTH, SQUARE_SIZE // 2), RADIUS)
+        pygame.display.update()
+    results["full redraw, motion"] = (time.perf_counter() - start) / motions
+
+    board = create_board()
+    renderer.draw_all(board)
+    for i, ch in enumerate(moves):
+        start = time.perf_counter()
+        col = int(ch)
+        drop_piece(board, get_next_open_row(board, col), col, 1 + i % 2)
+        renderer.present(renderer.update_board(board), "move", start)
+    for i in range(motions):
+        start = time.perf_counter()
+        renderer.present(renderer.draw_hover(i % WIDTH), "motion", start)
+    #Falling pieces stepped at 60 frames a second of simulated time
+    board = create_board()
+    renderer.draw_all(board)
+    ticks = 0
+    for i, ch in enumerate(moves):
+        col = int(ch)
+        drop_piece(board, get_next_open_row(board, col), col, 1 + i % 2)
+        renderer.update_board(board, animate=True)
+        while renderer.animating:
+            ticks += 1000 // 60
+            start = time.perf_counter()
+            renderer.present(renderer.animate(ticks), "drop", start)
+    for kind, (_, ms) in renderer.frame_report().items():
+        results["renderer, " + kind] = ms / 1000
+    pygame.quit()
+    return results
+
+if __name__ == "__main__":
+    #--frame-times prints the average frame time per kind of frame at the end,
+    #--bench-render compares the renderer with a full redraw without playing
+    if "--bench-render" in sys.argv[1:]:
+        for name, seconds in benchmark_rendering().items():
+            print("%-20s %8.3fms" % (name, seconds * 1000))
+    else:
+        main(frame_times="--frame-times" in sys.argv[1:])
@@ -0,0 +1,1228 @@
+#Connect 4 engine: board helpers, evaluation and search
+#Nothing in here imports pygame (or numpy), so the game, tests, servers and worker processes can all import it cheaply
+import math
+import time
+
+ROWS, COLS = 6, 7
+PLAYER_PIECE = 1
+BOT_PIECE = 2
+
+def create_board():
+    return [[0 for _ in range(COLS)] for _ in range(ROWS)]
+
+def drop_piece(board, row, col, piece):
+    board[row][col] = piece
+
+# Function for the bot to drop pieces into a copy of the board for the minimax function
+# Deprecated 
+#def bot_drop_piece(board, row, col, piece):
+#    b_board = board.copy()
+#    b_board[row][col] = piece
+
+def is_valid_location(board, col):
+    return board[ROWS - 1][col] == 0
+
+def get_next_open_row(board, col):
+    for r in range(ROWS):
+        if board[r][col] == 0:
+            return r
+
+#Number of pieces in a column, which is also the next open row (ROWS when the column is full)
+def column_height(board, col):
+    row = get_next_open_row(board, col)
+    return ROWS if row is None else row
+
+#Simple check for a winning move
+def winning_move(board, piece):
+    #Every horizontal, vertical and diagonal line of four comes from the window table
+    cells = [cell for row in board for cell in row]
+    for a, b, c, d in WINDOWS:
+        if cells[a] == piece and cells[b] == piece and cells[c] == piece and cells[d] == piece:
+            return True
+    return False
+
+#Row and column steps of the four line directions: horizontal, vertical and both diagonals
+WIN_DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+#Win check for the stone just played at (row, col): only the four lines through it can have changed,
+#so it walks out both ways along each direction instead of scanning every window
+def winning_move_at(board, row, col, piece):
+    if board[row][col] != piece:
+        return False
+    for dr, dc in WIN_DIRECTIONS:
+        count = 1
+        r, c = row + dr, col + dc
+        while 0 <= r < ROWS and 0 <= c < COLS and board[r][c] == piece:
+            count += 1
+            r += dr
+            c += dc
+        r, c = row - dr, col - dc
+        while 0 <= r < ROWS and 0 <= c < COLS and board[r][c] == piece:
+            count += 1
+            r -= dr
+            c -= dc
+        if count >= 4:
+            return True
+    return False
+
+#Piece with four in a row, 0 if nobody has one yet
+#With last_move (row, col) only the lines through that stone are checked, which is enough as long as
+#nobody had won before it was played (always true inside the search, which stops at the first win)
+def winner(board, last_move=None):
+    if last_move is not None:
+        row, col = last_move
+        piece = board[row][col]
+        return piece if piece != 0 and winning_move_at(board, row, col, piece) else 0
+    if winning_move(board, BOT_PIECE):
+        return BOT_PIECE
+    if winning_move(board, PLAYER_PIECE):
+        return PLAYER_PIECE
+    return 0
+
+#Compact board: the cells live in one flat bytearray (index row * COLS + col, the same numbering as WINDOWS)
+#and heights[col] is the next open row of every column, so a drop or an undo is two byte writes
+#and a copy is two small buffer copies instead of rebuilding ROWS lists
+class Board:
+    __slots__ = ("cells", "heights")
+
+    def __init__(self, cells=None, heights=None):
+        self.cells = bytearray(ROWS * COLS) if cells is None else cells
+        self.heights = bytearray(COLS) if heights is None else heights
+
+    @classmethod
+    def from_list(cls, board):
+        cells = bytearray(cell for row in board for cell in row)
+        return cls(cells, bytearray(column_height(board, c) for c in range(COLS)))
+
+    def copy(self):
+        return Board(self.cells[:], self.heights[:])
+
+    #Nested lists in the layout create_board uses (board[row][col], row 0 at the bottom), e.g. for draw_board
+    def to_list(self):
+        cells = self.cells
+        return [list(cells[r * COLS:(r + 1) * COLS]) for r in range(ROWS)]
+
+    def valid_moves(self):
+        return [c for c in range(COLS) if self.heights[c] < ROWS]
+
+    #Drops piece into col and returns the row it landed in
+    def drop(self, col, piece):
+        row = self.heights[col]
+        if row >= ROWS:
+            raise ValueError("Column %d is full" % col)
+        self.cells[row * COLS + col] = piece
+        self.heights[col] = row + 1
+        return row
+
+    #Takes back the top stone of col
+    def undo(self, col):
+        if self.heights[col] == 0:
+            raise ValueError("Column %d is empty" % col)
+        row = self.heights[col] - 1
+        self.cells[row * COLS + col] = 0
+        self.heights[col] = row
+
+    #Four in a row for piece anywhere on the board, or only through (row, col) when given (see winning_move_at)
+    def is_win(self, piece, row=None, col=None):
+        cells = self.cells
+        if row is None:
+            for a, b, c, d in WINDOWS:
+                if cells[a] == piece and cells[b] == piece and cells[c] == piece and cells[d] == piece:
+                    return True
+            return False
+        if cells[row * COLS + col] != piece:
+            return False
+        for dr, dc in WIN_DIRECTIONS:
+            count = 1
+            for sign in (1, -1):
+                r, c = row + sign * dr, col + sign * dc
+                while 0 <= r < ROWS and 0 <= c < COLS and cells[r * COLS + c] == piece:
+                    count += 1
+                    r += sign * dr
+                    c += sign * dc
+            if count >= 4:
+                return True
+        return False
+
+    #Hashable snapshot of the cells
+    def key(self):
+        return bytes(self.cells)
+
+#Every four cell window on the board, built once from ROWS and COLS
+#A window is a tuple of flat cell indices (row * COLS + col): horizontal ones first, then vertical, then both diagonals
+def build_windows(rows, cols):
+    windows = []
+    for r in range(rows):
+        for c in range(cols - 3):
+            windows.append(tuple(r * cols + c + i for i in range(4)))
+    for c in range(cols):
+        for r in range(rows - 3):
+            windows.append(tuple((r + i) * cols + c for i in range(4)))
+    for r in range(rows - 3):
+        for c in range(cols - 3):
+            windows.append(tuple((r + i) * cols + c + i for i in range(4)))
+    for r in range(rows - 3):
+        for c in range(cols - 3):
+            windows.append(tuple((r + 3 - i) * cols + c + i for i in range(4)))
+    return windows
+
+WINDOWS = build_windows(ROWS, COLS)
+#Reverse index: the windows (positions in WINDOWS) going through each flat cell
+def build_cell_windows(windows):
+    cell_windows = [[] for _ in range(ROWS * COLS)]
+    for w, cells in enumerate(windows):
+        for cell in cells:
+            cell_windows[cell].append(w)
+    return cell_windows
+
+CELL_WINDOWS = build_cell_windows(WINDOWS)
+
+#Evaluation function used to get a simple score from board positions
+#Strategy: the bot scores the middle of the board higher than other sections
+def position_evaluation(board, piece):
+    score = 0
+
+    #Added a 4 point weight to the center of the board
+    c_arr = [int(board[i][COLS//2]) for i in range(ROWS)]
+    c_count = c_arr.count(piece)
+    score += c_count * 4
+
+    #Horizontal, vertical and diagonal scoring all come from the window table
+    cells = [int(cell) for row in board for cell in row]
+    for a, b, c, d in WINDOWS:
+        score += evaluate_moves([cells[a], cells[b], cells[c], cells[d]], piece)
+    return score
+
+#This function evaluates the specific moves on the board
+#Implementation is fairly simple, the more pieces it can line up in a row, the higher the score
+#Similarly, if it sees a winning move or nearly a winning move, it looks to block that move
+def evaluate_moves(block, piece):
+    score = 0
+
+    if piece == BOT_PIECE:
+        opposition = PLAYER_PIECE
+    else:
+        opposition = BOT_PIECE
+    
+    #Bot sees a winning move
+    if block.count(piece) == 4:
+        score += 50
+    #Bot sees a move where it can win on its next move
+    elif block.count(piece) == 3 and block.count(0) == 1:
+        score += 6
+    #Bot sees this favorably
+    elif block.count(piece) == 2 and block.count(0) == 2:
+        score += 3
+    #Bot sees an opponents winning move
+    if block.count(opposition) == 3 and block.count(0) == 1:
+        score -= 8
+
+    return score
+    
+#Main minimax function to search the tree for plays
+#last_move is the (row, col) of the stone that was just played, so only the lines through it are checked for a win
+def minimax(board, depth, alpha, beta, is_max, last_move=None):
+    #Checks all potential moves, basically every column available
+    all_plays = [p for p in range(COLS) if is_valid_location(board, p)]
+    won = winner(board, last_move)
+    end_of_game = won != 0 or len(all_plays) == 0
+
+    if depth == 0 or end_of_game:
+        if end_of_game:
+            #Using an arbitrary number to determine outcome, in this case I just used the current episode count of One Piece times 100
+            if won == BOT_PIECE:
+                return None, 112400
+            elif won == PLAYER_PIECE:
+                return None, -112400
+            else:
+                return None, 0
+        else:
+            return None, position_evaluation(board, BOT_PIECE)
+        
+    #Maximizing
+    if is_max:
+        v = -math.inf
+        best_col = all_plays[0]
+        for c in all_plays:
+            row = get_next_open_row(board, c)
+            temp_board = [row[:] for row in board]
+            drop_piece(temp_board, row, c, BOT_PIECE)
+            ingest_score = minimax(temp_board, depth - 1, alpha, beta, False, (row, c))[1]
+            if ingest_score > v:
+                v = ingest_score
+                best_col = c
+            alpha = max(alpha, v)
+            if alpha >= beta:
+                break
+        return best_col, v
+
+    #Minimizing
+    else:
+        v = math.inf
+        best_col = all_plays[0]
+        for c in all_plays:
+            row = get_next_open_row(board, c)
+            temp_board = [row[:] for row in board]
+            drop_piece(temp_board, row, c, PLAYER_PIECE)
+            ingest_score = minimax(temp_board, depth - 1, alpha, beta, True, (row, c))[1]
+            if ingest_score < v:
+                v = ingest_score
+                best_col = c
+            beta = min(beta, v)
+            if alpha >= beta:
+                break
+        return best_col, v
+        
+#Same search as minimax, but it plays every move on the one board it is given and takes it back after the recursion
+#heights[c] is the next open row of column c, so dropping and undoing a piece is a single assignment
+def minimax_in_place(board, depth, alpha, beta, is_max, heights=None, last_move=None):
+    if heights is None:
+        heights = [column_height(board, c) for c in range(COLS)]
+    all_plays = [p for p in range(COLS) if heights[p] < ROWS]
+    won = winner(board, last_move)
+    end_of_game = won != 0 or len(all_plays) == 0
+
+    if depth == 0 or end_of_game:
+        if end_of_game:
+            if won == BOT_PIECE:
+                return None, 112400
+            elif won == PLAYER_PIECE:
+                return None, -112400
+            else:
+                return None, 0
+        else:
+            return None, position_evaluation(board, BOT_PIECE)
+
+    #Maximizing
+    if is_max:
+        v = -math.inf
+        best_col = all_plays[0]
+        for c in all_plays:
+            row = heights[c]
+            drop_piece(board, row, c, BOT_PIECE)
+            heights[c] += 1
+            ingest_score = minimax_in_place(board, depth - 1, alpha, beta, False, heights, (row, c))[1]
+            heights[c] -= 1
+            drop_piece(board, row, c, 0)
+            if ingest_score > v:
+                v = ingest_score
+                best_col = c
+            alpha = max(alpha, v)
+            if alpha >= beta:
+                break
+        return best_col, v
+
+    #Minimizing
+    else:
+        v = math.inf
+        best_col = all_plays[0]
+        for c in all_plays:
+            row = heights[c]
+            drop_piece(board, row, c, PLAYER_PIECE)
+            heights[c] += 1
+            ingest_score = minimax_in_place(board, depth - 1, alpha, beta, True, heights, (row, c))[1]
+            heights[c] -= 1
+            drop_piece(board, row, c, 0)
+            if ingest_score < v:
+                v = ingest_score
+                best_col = c
+            beta = min(beta, v)
+            if alpha >= beta:
+                break
+        return best_col, v
+
+#Without a time budget the bot searches a fixed depth, with one it deepens until the budget runs out
+#With solver_stones set, positions with at least that many stones are solved exactly instead (see solver.py).
+#Without a time budget the solver runs until it has proved the result, which can take minutes on positions with
+#few stones. With one it gets half the budget, if that is not enough the search gets what is left and
+#info["solver_timed_out"] is set. Positions found in book (an OpeningBook from book.py) are played straight from it
+#Pass a dict as info to get the depth reached, nodes searched and time taken for the move,
+#and a SearchStats as stats for the detailed counters of the search (book and solver moves leave it empty).
+#info["pv"] is the line the bot expects, starting with its move. root_scores=True adds info["root_scores"],
+#the exact score of every column at info["root_scores_depth"] plies. With a time budget the search gets half of it
+#and the root scores are deepened in what is left, so they can be shallower than the search. Without one they are
+#searched to the full depth on top of the move. trace (a file) gets the search tree as JSON lines
+#down to trace_depth plies (see TracingSearch)
+def bot_move(board, time_budget_ms=None, info=None, solver_stones=None, book=None, stats=None,
+             root_scores=False, trace=None, trace_depth=3):
+    bb = board_to_bitboard(board, BOT_PIECE)
+    hit = book.lookup(bb) if book is not None else None
+    result = None
+    solver_timed_out = False
+    if hit is not None:
+        col, score = hit
+        result = {"depth": 0, "nodes": 0, "time_ms": 0.0, "score": score, "book": True, "pv": [col]}
+    elif (solver_stones is not None and bb.moves >= solver_stones and bb.mask != BB_BOARD
+          and not bb_alignment(bb.current) and not bb_alignment(bb.current ^ bb.mask)):
+        #The solver only scores games that are still going, a finished one goes to the search below
+        #Imported here since solver.py builds on this module
+        from solver import Solver, score_to_result
+        start = time.perf_counter()
+        solver = Solver(deadline=None if time_budget_ms is None else start + time_budget_ms / 2000)
+        try:
+            col, score = solver.best_move(bb)
+        except SearchTimeout:
+            solver_timed_out = True
+            time_budget_ms = max(0.0, time_budget_ms - (time.perf_counter() - start) * 1000)
+        else:
+            outcome, plies = score_to_result(score, bb.moves)
+            result = {"depth": plies, "nodes": solver.nodes, "time_ms": (time.perf_counter() - start) * 1000,
+                      "score": score, "solved": outcome, "pv": [col]}
+    if result is None and time_budget_ms is None:
+        #Maximum depth can be adjusted to allow the tree to search deeper
+        #4 is currently the best sweet spot but we can make some optimizations if needed
+        max_depth = 4
+        start = time.perf_counter()
+        #The bitboard search gives the same result as minimax without copying the board at every node,
+        #the threat pass only skips moves that are won or lost anyway
+        if trace is None:
+            search = Search(stats=stats, threats=True)
+        else:
+            search = TracingSearch(trace, trace_depth, stats=stats, threats=True)
+        col, score = search.minimax(bb, max_depth, -math.inf, math.inf, True)
+        result = {"depth": max_depth, "nodes": search.nodes, "time_ms": (time.perf_counter() - start) * 1000, "score": score,
+                  "pv": list(search.line)}
+        if stats is not None:
+            stats.iterations.append({"depth": max_depth, "nodes": search.nodes, "time_ms": result["time_ms"],
+                                     "cumulative_nodes": search.nodes, "cumulative_time_ms": result["time_ms"]})
+    elif result is None:
+        start = time.perf_counter()
+        col, _, result = bb_iterative_deepening(bb, time_budget_ms / 2 if root_scores else time_budget_ms,
+                                                stats=stats, trace=trace, trace_depth=trace_depth)
+    if solver_timed_out:
+        result["solver_timed_out"] = True
+    if root_scores and hit is None and "solved" not in result:
+        if time_budget_ms is None:
+            result["root_scores"], result["root_scores_depth"] = bb_root_scores(bb, result["depth"]), result["depth"]
+        else:
+            #Each depth gets a fresh table, entries from deeper searches would make the scores deeper than stated.
+            #The deepest complete table is kept, depth 1 runs without the deadline so there always is one
+            deadline = start + time_budget_ms / 1000
+            for depth in range(1, max(1, result["depth"]) + 1):
+                try:
+                    scores = bb_root_scores(bb, depth, deadline=None if depth == 1 else deadline)
+                except SearchTimeout:
+                    break
+                result["root_scores"], result["root_scores_depth"] = scores, depth
+    if info is not None:
+        info.update(result)
+    return col
+
+#Bitboard version of the board used by the search
+#Each column takes ROWS + 1 bits (one extra sentinel bit on top), so bit (col * (ROWS + 1) + row) is board[row][col]
+#Only two integers are kept: the stones of the player to move and the mask of every occupied cell
+BB_HEIGHT = ROWS + 1
+BB_CENTER = ((1 << ROWS) - 1) << ((COLS // 2) * BB_HEIGHT)
+
+def bb_bottom_mask(col):
+    return 1 << (col * BB_HEIGHT)
+
+def bb_top_mask(col):
+    return 1 << (ROWS - 1 + col * BB_HEIGHT)
+
+BB_TOP = [bb_top_mask(c) for c in range(COLS)]
+
+def bb_column_mask(col):
+    return ((1 << ROWS) - 1) << (col * BB_HEIGHT)
+
+#The window table as bitmasks, BB_WINDOWS[w] covers the same cells as WINDOWS[w]
+def bb_cell_bit(cell):
+    return 1 << ((cell % COLS) * BB_HEIGHT + cell // COLS)
+
+BB_WINDOWS = [sum(bb_cell_bit(cell) for cell in window) for window in WINDOWS]
+
+#Score of a window by (own pieces, opponent pieces), taken straight from evaluate_moves so the weights only live in one place
+BB_WINDOW_SCORE = [[evaluate_moves([BOT_PIECE] * own + [PLAYER_PIECE] * opp + [0] * (4 - own - opp), BOT_PIECE) if own + opp <= 4 else 0
+                    for opp in range(5)] for own in range(5)]
+
+#Windows grouped by direction: the shift between their cells and a mask of the lowest cell of every window
+#This lets the evaluation count all windows of one direction at once instead of one by one
+def bb_window_starts():
+    starts = {}
+    for w in BB_WINDOWS:
+        low = w & -w
+        shift = ((w ^ low) & -(w ^ low)).bit_length() - low.bit_length()
+        starts[shift] = starts.get(shift, 0) | low
+    return list(starts.items())
+
+BB_WINDOW_STARTS = bb_window_starts()
+
+#The evaluation works on all four directions at once: every direction gets its own BB_LANE bits of one big integer.
+#Multiplying a bitboard by BB_LANE_SHIFTS[j] puts a copy of it shifted up by j cells of that direction in every lane,
+#so the four cells of each window line up on its highest cell, and BB_WINDOW_TOPS marks those highest cells.
+#A lane holds the 49 bits of a bitboard shifted up by at most 3 * (BB_HEIGHT + 1) bits, so copies never overlap
+BB_LANE = 80
+BB_LANE_SHIFTS = [sum(1 << (BB_LANE * d + j * shift) for d, (shift, _) in enumerate(BB_WINDOW_STARTS)) for j in range(4)]
+BB_WINDOW_TOPS = sum((starts << (3 * shift)) << (BB_LANE * d) for d, (shift, starts) in enumerate(BB_WINDOW_STARTS))
+BB_SCORE_FOUR = BB_WINDOW_SCORE[4][0]
+BB_SCORE_THREE = BB_WINDOW_SCORE[3][0]
+BB_SCORE_TWO = BB_WINDOW_SCORE[2][0]
+BB_SCORE_OPP_THREE = BB_WINDOW_SCORE[0][3]
+
+class BitBoard:
+    __slots__ = ("current", "mask", "moves", "to_move")
+
+    def __init__(self, current=0, mask=0, moves=0, to_move=BOT_PIECE):
+        self.current = current  # stones of the player to move
+        self.mask = mask        # every occupied cell
+        self.moves = moves
+        self.to_move = to_move
+
+    def copy(self):
+        return BitBoard(self.current, self.mask, self.moves, self.to_move)
+
+def board_to_bitboard(board, to_move=BOT_PIECE):
+    current, mask, moves = 0, 0, 0
+    for r in range(ROWS):
+        for c in range(COLS):
+            if board[r][c] != 0:
+                bit = 1 << (c * BB_HEIGHT + r)
+                mask |= bit
+                moves += 1
+                if board[r][c] == to_move:
+                    current |= bit
+    return BitBoard(current, mask, moves, to_move)
+
+#Converts back to the list layout so draw_board can still be used
+def bitboard_to_board(bb):
+    new_board = [[0 for _ in range(COLS)] for _ in range(ROWS)]
+    mover = bb.current
+    other = bb.current ^ bb.mask
+    other_piece = PLAYER_PIECE if bb.to_move == BOT_PIECE else BOT_PIECE
+    for r in range(ROWS):
+        for c in range(COLS):
+            bit = 1 << (c * BB_HEIGHT + r)
+            if mover & bit:
+                new_board[r][c] = bb.to_move
+            elif other & bit:
+                new_board[r][c] = other_piece
+    return new_board
+
+#Builds a position from a string of column digits ("3342" = col 3, col 3, col 4, col 2), first is the piece that moves first
+def bb_from_moves(moves, first=PLAYER_PIECE):
+    bb = BitBoard(to_move=first)
+    for ch in moves:
+        col = int(ch)
+        if not 0 <= col < COLS or not bb_is_valid_location(bb, col):
+            raise ValueError("Invalid move sequence: " + moves)
+        bb_drop_piece(bb, col)
+    return bb
+
+def bb_pieces(bb, piece):
+    if piece == bb.to_move:
+        return bb.current
+    return bb.current ^ bb.mask
+
+def bb_is_valid_location(bb, col):
+    return bb.mask & BB_TOP[col] == 0
+
+def bb_get_next_open_row(bb, col):
+    return (bb.mask & bb_column_mask(col)).bit_count()
+
+#Plays a move for the player to move (make)
+def bb_drop_piece(bb, col):
+    bb.current ^= bb.mask
+    bb.mask |= bb.mask + bb_bottom_mask(col)
+    bb.moves += 1
+    bb.to_move = PLAYER_PIECE if bb.to_move == BOT_PIECE else BOT_PIECE
+
+#Takes back the top stone of a column (unmake)
+def bb_undo_piece(bb, col):
+    top = bb.mask & bb_column_mask(col)
+    bb.mask ^= 1 << (top.bit_length() - 1)
+    bb.current ^= bb.mask
+    bb.moves -= 1
+    bb.to_move = PLAYER_PIECE if bb.to_move == BOT_PIECE else BOT_PIECE
+
+#Four in a row check with shifts: vertical, horizontal and both diagonals
+def bb_alignment(pos):
+    for shift in (1, BB_HEIGHT, BB_HEIGHT - 1, BB_HEIGHT + 1):
+        m = pos & (pos >> shift)
+        if m & (m >> (2 * shift)):
+            return True
+    return False
+
+def bb_winning_move(bb, piece):
+    return bb_alignment(bb_pieces(bb, piece))
+
+#Threat helpers shared by the search and the solver
+BB_BOTTOM = sum(bb_bottom_mask(c) for c in range(COLS))
+BB_BOARD = BB_BOTTOM * ((1 << ROWS) - 1)
+
+#Shifts to the next, second and third cell along a row and both diagonals
+BB_LINE_SHIFTS = tuple((s, 2 * s, 3 * s) for s in (BB_HEIGHT, BB_HEIGHT - 1, BB_HEIGHT + 1))
+
+#Every empty cell where a stone of position would complete four in a row
+def bb_winning_cells(position, mask):
+    #Vertical
+    r = (position << 1) & (position << 2) & (position << 3)
+    #Horizontal and both diagonals, with the missing stone at any of the four places
+    for s1, s2, s3 in BB_LINE_SHIFTS:
+        up1 = position << s1
+        down1 = position >> s1
+        r |= (up1 & (position << s2) & ((position << s3) | down1)) | (down1 & (position >> s2) & (up1 | (position >> s3)))
+    return r & (BB_BOARD ^ mask)
+
+#Cell the next stone of every playable column lands in
+def bb_playable_cells(mask):
+    return (mask + BB_BOTTOM) & BB_BOARD
+
+#Playable cells that do not hand the opponent an immediate win, 0 when every move loses
+def bb_non_losing_moves(position, mask):
+    possible = bb_playable_cells(mask)
+    opponent_win = bb_winning_cells(position ^ mask, mask)
+    forced = possible & opponent_win
+    if forced:
+        #Two forced moves means the opponent wins whatever we play
+        if forced & (forced - 1):
+            return 0
+        possible = forced
+    #Never play right below an opponent winning cell
+    return possible & ~(opponent_win >> 1)
+
+#Bit-parallel version of position_evaluation
+#The four cells of every window are shifted onto one cell of the window and added up bitwise,
+#so the number of windows with a given count is one popcount. Only the window types evaluate_moves scores are counted:
+#own pieces with no opponent piece, and three opponent pieces with no own piece
+def bb_position_evaluation(bb, piece):
+    return bb_score(bb_pieces(bb, piece), bb.mask)
+
+#The evaluation itself, from the stones of one side and the mask
+def bb_score(own, mask):
+    opp = own ^ mask
+    shift0, shift1, shift2, shift3 = BB_LANE_SHIFTS
+    o0, o1, o2, o3 = own * shift0, own * shift1, own * shift2, own * shift3
+    p0, p1, p2, p3 = opp * shift0, opp * shift1, opp * shift2, opp * shift3
+
+    #Own windows: bitwise sum of the four cells, bit0 + 2 * bit1, and four when both pairs are full
+    windows = BB_WINDOW_TOPS & ~(p0 | p1 | p2 | p3)
+    low_a, high_a, low_b, high_b = o0 ^ o1, o0 & o1, o2 ^ o3, o2 & o3
+    bit0 = low_a ^ low_b
+    bit1 = (high_a ^ high_b ^ (low_a & low_b)) & windows
+    score = ((own & BB_CENTER).bit_count() * 4
+             + (windows & high_a & high_b).bit_count() * BB_SCORE_FOUR
+             + (bit1 & bit0).bit_count() * BB_SCORE_THREE
+             + (bit1 & ~bit0).bit_count() * BB_SCORE_TWO)
+
+    #Opponent windows with three pieces and an empty cell, no window can hold four since the game would be over
+    windows = BB_WINDOW_TOPS & ~(o0 | o1 | o2 | o3)
+    low_a, low_b = p0 ^ p1, p2 ^ p3
+    bit1 = (p0 & p1) ^ (p2 & p3) ^ (low_a & low_b)
+    return score + (windows & bit1 & (low_a ^ low_b)).bit_count() * BB_SCORE_OPP_THREE
+
+#Leaf scores keyed by position, the same leaf is reached through several move orders during one search
+#The cache is simply emptied once it reaches BB_EVAL_CACHE_SIZE entries
+BB_EVAL_CACHE_SIZE = 1 << 18
+bb_eval_cache = {}
+
+def bb_cached_evaluation(bb):
+    return bb_cached_score(bb_pieces(bb, BOT_PIECE), bb.mask)
+
+def bb_cached_score(bot, mask):
+    key = bot + mask
+    score = bb_eval_cache.get(key)
+    if score is None:
+        if len(bb_eval_cache) >= BB_EVAL_CACHE_SIZE:
+            bb_eval_cache.clear()
+        score = bb_score(bot, mask)
+        bb_eval_cache[key] = score
+    return score
+
+#Mirror image of a bitboard (or key) about the center column. Every column keeps its own BB_HEIGHT bits,
+#so the columns are swapped in pairs (c, COLS - 1 - c) and an odd center column stays where it is
+BB_FULL_COLUMN = (1 << BB_HEIGHT) - 1
+BB_MIRROR_FIXED = BB_FULL_COLUMN << ((COLS // 2) * BB_HEIGHT) if COLS % 2 else 0
+BB_MIRROR_SWAPS = [(BB_FULL_COLUMN << (c * BB_HEIGHT), (COLS - 1 - 2 * c) * BB_HEIGHT) for c in range(COLS // 2)]
+
+def bb_mirror(x):
+    r = x & BB_MIRROR_FIXED
+    for low, shift in BB_MIRROR_SWAPS:
+        r |= ((x & low) << shift) | ((x >> shift) & low)
+    return r
+
+def mirror_col(col):
+    return COLS - 1 - col
+
+#Bot stones plus the mask encode every column of a position and the last bit of the key is the player to move.
+#A position and its mirror image have the same value with mirrored moves, so both share one key:
+#the smaller of the key and the mirrored key. Returns (key, mirrored), a move stored under the key
+#is for the mirrored position when mirrored is True
+def bb_canonical_key(bb):
+    bot = bb.current if bb.to_move == BOT_PIECE else bb.current ^ bb.mask
+    board = bot + bb.mask
+    mirror = bb_mirror(board)
+    if mirror < board:
+        return (mirror << 1) | (bb.to_move == BOT_PIECE), True
+    return (board << 1) | (bb.to_move == BOT_PIECE), False
+
+#Key of the solver and the opening book: the stones of the player to move plus the mask, which also encodes
+#every column. As in bb_canonical_key a position and its mirror image share the smaller of the key and the
+#mirrored key. Returns (key, mirrored)
+def bb_mover_key(position, mask):
+    key = position + mask
+    mirror = bb_mirror(key)
+    return (mirror, True) if mirror < key else (key, False)
+
+#Bound types stored with a transposition table score
+TT_EXACT = 0
+TT_LOWER = 1
+TT_UPPER = 2
+
+#Smallest prime >= n, a prime bucket count spreads the bitboard keys (which only differ in a few bits) evenly
+def next_prime(n):
+    n = max(n, 2)
+    while any(n % d == 0 for d in range(2, int(n ** 0.5) + 1)):
+        n += 1
+    return n
+
+#Transposition table for the bitboard search
+#Entries are (key, depth, score, flag, best_col) tuples. Every bucket has two slots:
+#a depth-preferred slot that only gives way to a search at least as deep, and an always-replace slot
+#that takes everything else (including what gets pushed out of the first slot)
+class TranspositionTable:
+    def __init__(self, max_entries=1 << 20):
+        self.buckets = next_prime(max_entries // 2)
+        self.deep = [None] * self.buckets
+        self.recent = [None] * self.buckets
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def probe(self, key):
+        i = key % self.buckets
+        entry = self.deep[i]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        other = self.recent[i]
+        if other is not None and other[0] == key:
+            self.hits += 1
+            return other
+        self.misses += 1
+        if entry is not None or other is not None:
+            self.collisions += 1
+        return None
+
+    def store(self, key, depth, score, flag, best_col):
+        i = key % self.buckets
+        entry = (key, depth, score, flag, best_col)
+        old = self.deep[i]
+        self.stores += 1
+        if old is None or depth >= old[1]:
+            self.deep[i] = entry
+            if old is not None and old[0] != key:
+                if self.recent[i] is not None:
+                    self.overwrites += 1
+                self.recent[i] = old
+        else:
+            if self.recent[i] is not None and self.recent[i][0] != key:
+                self.overwrites += 1
+            self.recent[i] = entry
+
+    def clear(self):
+        self.deep = [None] * self.buckets
+        self.recent = [None] * self.buckets
+
+    def __len__(self):
+        return sum(e is not None for e in self.deep) + sum(e is not None for e in self.recent)
+
+    #Counters for sizing the table
+    def stats(self):
+        probes = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "capacity": 2 * self.buckets,
+            "hits": self.hits,
+            "misses": self.misses,
+            "collisions": self.collisions,
+            "stores": self.stores,
+            "overwrites": self.overwrites,
+            "hit_rate": self.hits / probes if probes else 0.0,
+        }
+
+#Window contents are stored as bot pieces * 5 + player pieces, these give the window score for either side
+EVAL_BOT_SCORE = [BB_WINDOW_SCORE[code // 5][code % 5] for code in range(25)]
+EVAL_PLAYER_SCORE = [BB_WINDOW_SCORE[code % 5][code // 5] for code in range(25)]
+
+#Evaluation kept up to date move by move instead of rescanning the board at every leaf
+#Every window keeps its piece counts for both players, so a move or a take back only rescores
+#the windows through that cell and score() is just a lookup. Scores are the same as position_evaluation
+class IncrementalEvaluator:
+    def __init__(self, board=None):
+        self.counts = [0] * len(BB_WINDOWS)
+        self.scores = {BOT_PIECE: 0, PLAYER_PIECE: 0}
+        if board is not None:
+            for r in range(ROWS):
+                for c in range(COLS):
+                    if board[r][c] != 0:
+                        self.play(r, c, board[r][c])
+
+    @classmethod
+    def from_bitboard(cls, bb):
+        return cls(bitboard_to_board(bb))
+
+    def play(self, row, col, piece):
+        self._update(row, col, piece, 5 if piece == BOT_PIECE else 1)
+
+    def undo(self, row, col, piece):
+        self._update(row, col, piece, -5 if piece == BOT_PIECE else -1)
+
+    def _update(self, row, col, piece, step):
+        counts = self.counts
+        bot_delta = 0
+        player_delta = 0
+        for w in CELL_WINDOWS[row * COLS + col]:
+            old = counts[w]
+            new = old + step
+            counts[w] = new
+            bot_delta += EVAL_BOT_SCORE[new] - EVAL_BOT_SCORE[old]
+            player_delta += EVAL_PLAYER_SCORE[new] - EVAL_PLAYER_SCORE[old]
+        if col == COLS // 2:
+            if step > 0:
+                bot_delta += 4 if piece == BOT_PIECE else 0
+                player_delta += 4 if piece == PLAYER_PIECE else 0
+            else:
+                bot_delta -= 4 if piece == BOT_PIECE else 0
+                player_delta -= 4 if piece == PLAYER_PIECE else 0
+        self.scores[BOT_PIECE] += bot_delta
+        self.scores[PLAYER_PIECE] += player_delta
+
+    def score(self, piece):
+        return self.scores[piece]
+
+#Raised inside a search once its deadline has passed or it was told to stop
+class SearchTimeout(Exception):
+    pass
+
+#Move ordering heuristics the search can use, alone or together (ORDER_ALL)
+#"center": columns from the middle out, "tt": the transposition table's best move first,
+#"killers": the last two moves that caused a cutoff at the same ply, "history": moves that caused cutoffs anywhere,
+#weighted by depth squared. Without any of them columns are tried left to right like minimax does
+ORDER_ALL = ("center", "tt", "killers", "history")
+CENTER_ORDER = sorted(range(COLS), key=lambda c: abs(c - COLS // 2))
+
+#Counters filled in by a search that is given one (Search(stats=...), bb_iterative_deepening, bot_move):
+#nodes by ply (the number of stones on the board at the node), leaf evaluations, terminal positions reached,
+#beta cutoffs by the index of the move that caused them, transposition table probes, hits and cutoffs,
+#and one entry per iteration of iterative deepening: the nodes and time of that iteration alone and, as
+#cumulative_nodes and cumulative_time_ms, since the search started. A search without one only pays an "is not None" check per node
+class SearchStats:
+    def __init__(self):
+        self.nodes_per_ply = [0] * (ROWS * COLS + 1)
+        self.leaf_evaluations = 0
+        self.terminal_hits = 0
+        self.cutoffs_by_move = [0] * COLS
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.tt_cutoffs = 0
+        self.iterations = []
+
+    @property
+    def nodes(self):
+        return sum(self.nodes_per_ply)
+
+    #Plain dict for printing or JSON, nodes_per_ply starts at the ply of the root
+    def as_dict(self):
+        plies = [ply for ply, n in enumerate(self.nodes_per_ply) if n]
+        first, last = (plies[0], plies[-1]) if plies else (0, -1)
+        return {
+            "nodes": self.nodes,
+            "root_ply": first,
+            "nodes_per_ply": self.nodes_per_ply[first:last + 1],
+            "leaf_evaluations": self.leaf_evaluations,
+            "terminal_hits": self.terminal_hits,
+            "cutoffs_by_move": list(self.cutoffs_by_move),
+            "tt_probes": self.tt_probes,
+            "tt_hits": self.tt_hits,
+            "tt_cutoffs": self.tt_cutoffs,
+            "iterations": list(self.iterations),
+        }
+
+#Same search as minimax, but plays and takes back moves on one bitboard instead of copying the board
+#The search object keeps what has to survive between nodes: the transposition table, the node count,
+#an optional deadline and stop callable (checked every 1024 nodes), the move ordering tables, the line of best moves
+#found below the last node searched and optionally a SearchStats.
+#With threats=True every node first looks at immediate threats: a move that wins right away is played without
+#searching the others, and with two or more plies left only the moves that do not hand the opponent a win
+#on the next ply are searched (the forced block if there is one, never right below an opponent winning cell).
+#The moves it skips would have scored as won or lost anyway, so scores do not change; only which of several
+#equally won or lost moves is returned can. The threat pass reads the stones to play from bb.to_move, so it
+#needs is_max == (bb.to_move == BOT_PIECE) like the rest of the search
+class Search:
+    def __init__(self, tt=None, deadline=None, ordering=(), evaluator=None, stop=None, stats=None, threats=False):
+        unknown = set(ordering) - set(ORDER_ALL)
+        if unknown:
+            raise ValueError("Unknown move ordering: " + ", ".join(sorted(unknown)))
+        self.tt = tt
+        self.deadline = deadline
+        self.stop = stop
+        self.evaluator = evaluator
+        self.stats = stats
+        self.threats = threats
+        self.nodes = 0
+        self.line = []
+        self.columns = CENTER_ORDER if "center" in ordering else list(range(COLS))
+        self.use_tt_move = "tt" in ordering
+        self.killers = [[None, None] for _ in range(ROWS * COLS + 1)] if "killers" in ordering else None
+        self.history = [[0] * (BB_HEIGHT * COLS) for _ in range(2)] if "history" in ordering else None
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    #Share of beta cutoffs that came from the first move searched, the closer to 1 the better the ordering
+    def first_move_cutoff_rate(self):
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    #pv is the principal variation from an earlier search of this position, its moves are tried first
+    def minimax(self, bb, depth, alpha, beta, is_max, pv=()):
+        self.nodes += 1
+        stats = self.stats
+        if stats is not None:
+            stats.nodes_per_ply[bb.moves] += 1
+        if self.nodes & 1023 == 0:
+            if self.deadline is not None and time.perf_counter() > self.deadline:
+                raise SearchTimeout()
+            if self.stop is not None and self.stop():
+                raise SearchTimeout()
+        self.line = []
+
+        all_plays = [p for p in self.columns if bb.mask & BB_TOP[p] == 0]
+        mover_win = bb_alignment(bb.current)
+        other_win = bb_alignment(bb.current ^ bb.mask)
+        if bb.to_move == BOT_PIECE:
+            bot_win, player_win = mover_win, other_win
+        else:
+            bot_win, player_win = other_win, mover_win
+
+        if depth == 0 or bot_win or player_win or len(all_plays) == 0:
+            if stats is not None:
+                if bot_win or player_win or len(all_plays) == 0:
+                    stats.terminal_hits += 1
+                else:
+                    stats.leaf_evaluations += 1
+            if bot_win:
+                return None, 112400
+            elif player_win:
+                return None, -112400
+            elif len(all_plays) == 0:
+                return None, 0
+            elif self.evaluator is not None:
+                return None, self.evaluator.score(BOT_PIECE)
+            else:
+                return None, bb_cached_evaluation(bb)
+
+        if self.threats:
+            win = bb_winning_cells(bb.current, bb.mask) & bb_playable_cells(bb.mask)
+            if win:
+                if stats is not None:
+                    stats.terminal_hits += 1
+                for c in all_plays:
+                    if win & bb_column_mask(c):
+                        self.line = [c]
+                        return c, 112400 if is_max else -112400
+            if depth >= 2:
+                safe = bb_non_losing_moves(bb.current, bb.mask)
+                if safe == 0:
+                    if stats is not None:
+                        stats.terminal_hits += 1
+                    self.line = [all_plays[0]]
+                    return all_plays[0], -112400 if is_max else 112400
+                all_plays = [c for c in all_plays if safe & bb_column_mask(c)]
+
+        tt = self.tt
+        entry = None
+        if tt is not None:
+            key, mirrored = bb_canonical_key(bb)
+            entry = tt.probe(key)
+            if entry is not None and mirrored and entry[4] is not None:
+                entry = entry[:4] + (mirror_col(entry[4]),)
+            if stats is not None:
+                stats.tt_probes += 1
+                stats.tt_hits += entry is not None
+            if entry is not None and entry[1] >= depth:
+                _, _, score, flag, col = entry
+                if flag == TT_EXACT:
+                    if stats is not None:
+                        stats.tt_cutoffs += 1
+                    self.line = [col]
+                    return col, score
+                elif flag == TT_LOWER:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    if stats is not None:
+                        stats.tt_cutoffs += 1
+                    self.line = [col]
+                    return col, score
+        alpha_start, beta_start = alpha, beta
+
+        #Move ordering, the later a heuristic is applied the higher its priority
+        history = self.history
+        if history is not None:
+            side = history[is_max]
+            all_plays.sort(key=lambda c: -side[c * BB_HEIGHT + (bb.mask & bb_column_mask(c)).bit_count()])
+        if self.killers is not None:
+            for k in reversed(self.killers[bb.moves]):
+                if k is not None and k in all_plays:
+                    all_plays.remove(k)
+                    all_plays.insert(0, k)
+        if self.use_tt_move and entry is not None and entry[4] in all_plays:
+            all_plays.remove(entry[4])
+            all_plays.insert(0, entry[4])
+        if pv and pv[0] in all_plays:
+            all_plays.remove(pv[0])
+            all_plays.insert(0, pv[0])
+        else:
+            pv = ()
+
+        best_line = []
+        cutoff = None
+        evaluator = self.evaluator
+        #Maximizing
+        if is_max:
+            v = -math.inf
+            best_col = all_plays[0]
+            for i, c in enumerate(all_plays):
+                if evaluator is not None:
+                    row = (bb.mask & bb_column_mask(c)).bit_count()
+                    evaluator.play(row, c, BOT_PIECE)
+                bb_drop_piece(bb, c)
+                ingest_score = self.minimax(bb, depth - 1, alpha, beta, False, pv[1:] if pv and c == pv[0] else ())[1]
+                bb_undo_piece(bb, c)
+                if evaluator is not None:
+                    evaluator.undo(row, c, BOT_PIECE)
+                if ingest_score > v:
+                    v = ingest_score
+                    best_col = c
+                    best_line = self.line
+                alpha = max(alpha, v)
+                if alpha >= beta:
+                    cutoff = i
+                    break
+
+        #Minimizing
+        else:
+            v = math.inf
+            best_col = all_plays[0]
+            for i, c in enumerate(all_plays):
+                if evaluator is not None:
+                    row = (bb.mask & bb_column_mask(c)).bit_count()
+                    evaluator.play(row, c, PLAYER_PIECE)
+                bb_drop_piece(bb, c)
+                ingest_score = self.minimax(bb, depth - 1, alpha, beta, True, pv[1:] if pv and c == pv[0] else ())[1]
+                bb_undo_piece(bb, c)
+                if evaluator is not None:
+                    evaluator.undo(row, c, PLAYER_PIECE)
+                if ingest_score < v:
+                    v = ingest_score
+                    best_col = c
+                    best_line = self.line
+                beta = min(beta, v)
+                if alpha >= beta:
+                    cutoff = i
+                    break
+
+        if cutoff is not None:
+            self.cutoffs += 1
+            if cutoff == 0:
+                self.first_move_cutoffs += 1
+            if stats is not None:
+                stats.cutoffs_by_move[cutoff] += 1
+            c = all_plays[cutoff]
+            if self.killers is not None:
+                killers = self.killers[bb.moves]
+                if killers[0] != c:
+                    killers[1] = killers[0]
+                    killers[0] = c
+            if history is not None:
+                history[is_max][c * BB_HEIGHT + (bb.mask & bb_column_mask(c)).bit_count()] += depth * depth
+
+        if tt is not None:
+            if v <= alpha_start:
+                flag = TT_UPPER
+            elif v >= beta_start:
+                flag = TT_LOWER
+            else:
+                flag = TT_EXACT
+            tt.store(key, depth, v, flag, mirror_col(best_col) if mirrored else best_col)
+        self.line = [best_col] + best_line
+        return best_col, v
+
+#Search that also streams the nodes of the top trace_depth plies to trace (any object with a write method)
+#as JSON lines, for looking at the tree offline. A node is written once it is finished, children before parents:
+#{"id", "parent", "ply", "move", "depth", "alpha", "beta", "score", "best", "nodes"}, where move is the column played
+#to reach it, alpha and beta are the window it was searched with (null for infinite) and nodes the size of its subtree.
+#Only the path from the root to the current node is kept in memory, so the trace can be as large as the tree.
+#Every search from the root starts a new tree (a node without parent); nodes still open when a search times out are not written
+class TracingSearch(Search):
+    def __init__(self, trace, trace_depth=3, **kwargs):
+        Search.__init__(self, **kwargs)
+        #Imported here so the engine itself loads without it
+        import json
+        self.encode = json.JSONEncoder(separators=(",", ":")).encode
+        self.trace = trace
+        self.trace_depth = trace_depth
+        self.trace_path = []
+        self.trace_ids = 0
+
+    def minimax(self, bb, depth, alpha, beta, is_max, pv=()):
+        path = self.trace_path
+        if len(path) > self.trace_depth:
+            return Search.minimax(self, bb, depth, alpha, beta, is_max, pv)
+        node = self.trace_ids
+        self.trace_ids += 1
+        parent, move = None, None
+        if path:
+            parent, parent_mask = path[-1]
+            move = ((bb.mask ^ parent_mask).bit_length() - 1) // BB_HEIGHT
+        record = {"id": node, "parent": parent, "ply": len(path), "move": move, "depth": depth,
+                  "alpha": None if abs(alpha) == math.inf else alpha, "beta": None if abs(beta) == math.inf else beta}
+        nodes = self.nodes
+        path.append((node, bb.mask))
+        try:
+            col, score = Search.minimax(self, bb, depth, alpha, beta, is_max, pv)
+        finally:
+            path.pop()
+        record["score"] = score
+        record["best"] = col
+        record["nodes"] = self.nodes - nodes
+        self.trace.write(self.encode(record) + "\n")
+        return col, score
+
+#Exact score of every move at the root, searched depth plies deep in total like the root itself.
+#The search only proves the best move's score, the others are bounds, so every move gets a full window here
+#With a deadline it raises SearchTimeout when the time runs out, like Search
+def bb_root_scores(bb, depth, tt=None, ordering=ORDER_ALL, deadline=None):
+    search = Search(tt if tt is not None else TranspositionTable(), deadline, ordering=ordering, threats=True)
+    is_max = bb.to_move == BOT_PIECE
+    scores = {}
+    for col in range(COLS):
+        if bb.mask & BB_TOP[col] == 0:
+            child = bb.copy()
+            bb_drop_piece(child, col)
+            scores[col] = search.minimax(child, max(0, depth - 1), -math.inf, math.inf, not is_max)[1]
+    return scores
+
+#(column, top cell, bottom cell) of every column
+BB_COLUMN_CELLS = [(c, BB_TOP[c], bb_bottom_mask(c)) for c in range(COLS)]
+
+#Lean fixed-depth search for bb_minimax: the same tree and (col, score) as minimax, without what Search
+#checks at every node (table, ordering, deadline, stats). The position is two ints, the bot's stones and the mask,
+#and a child that wins, fills the board or is a leaf is scored right here instead of in a call of its own.
+#Only called on positions where nobody has won yet and with depth >= 1
+def bb_fast_minimax(bot, mask, depth, alpha, beta, is_max):
+    v = -math.inf if is_max else math.inf
+    best_col = None
+    cache = bb_eval_cache
+    #Empty cells where the side to move would complete four in a row, a move anywhere else cannot win
+    wins = bb_winning_cells(bot if is_max else bot ^ mask, mask)
+    for c, top, bottom in BB_COLUMN_CELLS:
+        if mask & top:
+            continue
+        if best_col is None:
+            best_col = c
+        child_mask = mask | (mask + bottom)
+        move = child_mask ^ mask
+        child_bot = bot | move if is_max else bot
+        if move & wins:
+            score = 112400 if is_max else -112400
+        elif child_mask == BB_BOARD:
+            score = 0
+        elif depth == 1:
+            #bb_cached_score written out, this is where the search spends most of its time
+            key = child_bot + child_mask
+            score = cache.get(key)
+            if score is None:
+                if len(cache) >= BB_EVAL_CACHE_SIZE:
+                    cache.clear()
+                score = bb_score(child_bot, child_mask)
+                cache[key] = score
+        else:
+            score = bb_fast_minimax(child_bot, child_mask, depth - 1, alpha, beta, not is_max)[1]
+        if is_max:
+            if score > v:
+                v = score
+                best_col = c
+            if v > alpha:
+                alpha = v
+        else:
+            if score < v:
+                v = score
+                best_col = c
+            if v < beta:
+                beta = v
+        if alpha >= beta:
+            break
+    return best_col, v
+
+#Fixed-depth bitboard search, with a transposition table it goes through Search.
+#The stones played are those of bb.to_move, so is_max has to be True exactly when that is the bot
+def bb_minimax(bb, depth, alpha, beta, is_max, tt=None):
+    if is_max != (bb.to_move == BOT_PIECE):
+        raise ValueError("is_max must be True exactly when the bot is to move")
+    if tt is not None or depth == 0:
+        return Search(tt).minimax(bb, depth, alpha, beta, is_max)
+    bot = bb_pieces(bb, BOT_PIECE)
+    if bb_alignment(bot):
+        return None, 112400
+    if bb_alignment(bot ^ bb.mask):
+        return None, -112400
+    if bb.mask == BB_BOARD:
+        return None, 0
+    return bb_fast_minimax(bot, bb.mask, depth, alpha, beta, is_max)
+
+def bb_bot_move(board, tt=None):
+    max_depth = 4
+    bb = board_to_bitboard(board, BOT_PIECE)
+    col, _ = bb_minimax(bb, max_depth, -math.inf, math.inf, True, tt)
+    return col
+
+#Iterative deepening: searches depth 1, 2, 3... until time_budget_ms runs out and keeps the result of the last depth
+#that finished. Every iteration tries the previous principal variation first and shares the transposition table
+#and move ordering tables. With trace set every iteration is traced (see TracingSearch).
+#Depth 1 always completes so there is a move even with a tiny budget. Returns (col, score, info), info["pv"] is
+#the principal variation of the last finished iteration
+def bb_iterative_deepening(bb, time_budget_ms, tt=None, max_depth=None, ordering=ORDER_ALL, stats=None,
+                           trace=None, trace_depth=3, threats=True):
+    start = time.perf_counter()
+    if tt is None:
+        tt = TranspositionTable()
+    if max_depth is None:
+        max_depth = ROWS * COLS - bb.moves
+    if trace is None:
+        search = Search(tt, ordering=ordering, stats=stats, threats=threats)
+    else:
+        search = TracingSearch(trace, trace_depth, tt=tt, ordering=ordering, stats=stats, threats=threats)
+    is_max = bb.to_move == BOT_PIECE
+    col, score, line = None, 0, []
+    info = {"depth": 0, "nodes": 0, "time_ms": 0.0, "iterations": []}
+
+    for depth in range(1, max(1, max_depth) + 1):
+        iteration_start, iteration_nodes = time.perf_counter(), search.nodes
+        try:
+            result = search.minimax(bb.copy(), depth, -math.inf, math.inf, is_max, tuple(line))
+        except SearchTimeout:
+            break
+        col, score = result
+        line = search.line
+        now = time.perf_counter()
+        elapsed_ms = (now - start) * 1000
+        info["depth"] = depth
+        #nodes and time_ms are this iteration's own, the cumulative ones count from the start of the search
+        iteration = {"depth": depth, "nodes": search.nodes - iteration_nodes, "time_ms": (now - iteration_start) * 1000,
+                     "cumulative_nodes": search.nodes, "cumulative_time_ms": elapsed_ms}
+        info["iterations"].append(iteration)
+        if stats is not None:
+            stats.iterations.append(iteration)
+        if elapsed_ms >= time_budget_ms or abs(score) == 112400:
+            break
+        search.deadline = start + time_budget_ms / 1000
+
+    info["nodes"] = search.nodes
+    info["first_move_cutoff_rate"] = search.first_move_cutoff_rate()
+    info["time_ms"] = (time.perf_counter() - start) * 1000
+    info["score"] = score
+    info["pv"] = list(line)
+    return col, score, info
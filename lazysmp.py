@@ -0,0 +1,229 @@
+#Lazy SMP search: several processes run iterative deepening on the same root and only share a transposition table
+#The table lives in shared memory, so whatever one worker learns cuts the search of the others. Workers are
+#staggered (odd workers start one depth ahead) and open with different root moves so they do not all walk the
+#same tree in lock step. The answer is the move of the deepest finished iteration from any worker
+import math
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from multiprocessing import shared_memory
+
+from engine import (BOT_PIECE, CENTER_ORDER, COLS, ORDER_ALL, ROWS, BitBoard, Search, SearchTimeout,
+                    bb_from_moves, board_to_bitboard, next_prime)
+
+#Entry layout: two 64-bit words, key ^ data and data. A reader only accepts an entry whose words
+#XOR back to its key, so an entry torn by two workers writing at once reads as a miss instead of garbage.
+#data packs score + 2**31 (32 bits), depth (8 bits), flag (2 bits), best column (4 bits, 15 = none) and a used bit
+NO_COL = 15
+USED_BIT = 1 << 46
+
+def pack_entry(depth, score, flag, best_col):
+    col = NO_COL if best_col is None else best_col
+    return (int(score) + (1 << 31)) | (depth << 32) | (flag << 40) | (col << 42) | USED_BIT
+
+def unpack_entry(key, data):
+    col = (data >> 42) & 15
+    return (key, (data >> 32) & 255, (data & 0xFFFFFFFF) - (1 << 31), (data >> 40) & 3, None if col == NO_COL else col)
+
+#Same two-tier table as engine.TranspositionTable (a depth-preferred and an always-replace slot per bucket),
+#stored as packed entries in a SharedMemory block that other processes attach to by name.
+#The hit/miss counters are local to each process
+class SharedTranspositionTable:
+    def __init__(self, max_entries=1 << 20, name=None):
+        if name is None:
+            self.buckets = next_prime(max_entries // 2)
+            self.shm = shared_memory.SharedMemory(create=True, size=self.buckets * 32)
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.buckets = self.shm.size // 32
+            self.owner = False
+        self.words = self.shm.buf.cast("Q")
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def _read(self, slot):
+        data = self.words[slot + 1]
+        if data == 0:
+            return None
+        return self.words[slot] ^ data, data
+
+    def probe(self, key):
+        base = (key % self.buckets) * 4
+        occupied = False
+        for slot in (base, base + 2):
+            found = self._read(slot)
+            if found is None:
+                continue
+            if found[0] == key:
+                self.hits += 1
+                return unpack_entry(key, found[1])
+            occupied = True
+        self.misses += 1
+        if occupied:
+            self.collisions += 1
+        return None
+
+    def store(self, key, depth, score, flag, best_col):
+        base = (key % self.buckets) * 4
+        data = pack_entry(depth, score, flag, best_col)
+        words = self.words
+        self.stores += 1
+        old = self._read(base)
+        if old is None or depth >= (old[1] >> 32) & 255:
+            words[base] = key ^ data
+            words[base + 1] = data
+            if old is not None and old[0] != key:
+                if self._read(base + 2) is not None:
+                    self.overwrites += 1
+                words[base + 2] = old[0] ^ old[1]
+                words[base + 3] = old[1]
+        else:
+            recent = self._read(base + 2)
+            if recent is not None and recent[0] != key:
+                self.overwrites += 1
+            words[base + 2] = key ^ data
+            words[base + 3] = data
+
+    def clear(self):
+        self.shm.buf[:] = bytes(self.shm.size)
+
+    def __len__(self):
+        return sum(1 for slot in range(1, 4 * self.buckets, 2) if self.words[slot] != 0)
+
+    def stats(self):
+        probes = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "capacity": 2 * self.buckets,
+            "hits": self.hits,
+            "misses": self.misses,
+            "collisions": self.collisions,
+            "stores": self.stores,
+            "overwrites": self.overwrites,
+            "hit_rate": self.hits / probes if probes else 0.0,
+        }
+
+    #Every process closes its own view, the process that created the block also removes it
+    def close(self):
+        self.words.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+#Runs in a worker process: iterative deepening on the shared table until max_depth, a proven result or stop.
+#Reports ("depth", worker, depth, col, score) after every finished iteration and ("done", worker, nodes) at the end
+def lazy_smp_worker(worker, table_name, state, max_depth, stop_event, results):
+    tt = SharedTranspositionTable(name=table_name)
+    search = Search(tt, ordering=ORDER_ALL, stop=stop_event.is_set)
+    bb = BitBoard(*state)
+    is_max = bb.to_move == BOT_PIECE
+    line = (CENTER_ORDER[worker % COLS],)
+    try:
+        for depth in range(1 + worker % 2, max_depth + 1):
+            try:
+                col, score = search.minimax(bb.copy(), depth, -math.inf, math.inf, is_max, line)
+            except SearchTimeout:
+                break
+            line = tuple(search.line)
+            results.put(("depth", worker, depth, col, score))
+            if abs(score) == 112400:
+                break
+    finally:
+        results.put(("done", worker, search.nodes))
+        tt.close()
+
+#Searches bb with the given number of worker processes until one of them finishes max_depth
+#(default: the rest of the game) or time_budget_ms runs out. Returns (col, score, info)
+def lazy_smp_search(bb, workers=None, max_depth=None, time_budget_ms=None, tt_entries=1 << 20):
+    workers = workers or os.cpu_count() or 1
+    if max_depth is None:
+        max_depth = ROWS * COLS - bb.moves
+    max_depth = max(1, max_depth)
+    start = time.perf_counter()
+    deadline = None if time_budget_ms is None else start + time_budget_ms / 1000
+
+    tt = SharedTranspositionTable(tt_entries)
+    stop_event = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    state = (bb.current, bb.mask, bb.moves, bb.to_move)
+    processes = [multiprocessing.Process(target=lazy_smp_worker, args=(i, tt.name, state, max_depth, stop_event, results))
+                 for i in range(workers)]
+    for p in processes:
+        p.start()
+
+    best = None
+    depth_times = {}
+    running = workers
+    nodes = 0
+    try:
+        while running:
+            #The deadline only applies once some iteration has finished, so there is always a move to return
+            timeout = None
+            if deadline is not None and best is not None and not stop_event.is_set():
+                timeout = max(0.0, deadline - time.perf_counter())
+            try:
+                message = results.get(timeout=timeout)
+            except queue.Empty:
+                stop_event.set()
+                continue
+            if message[0] == "done":
+                running -= 1
+                nodes += message[2]
+                continue
+            _, worker, depth, col, score = message
+            depth_times.setdefault(depth, (time.perf_counter() - start) * 1000)
+            if best is None or depth > best[0]:
+                best = (depth, col, score)
+            if depth >= max_depth or abs(score) == 112400:
+                stop_event.set()
+    finally:
+        stop_event.set()
+        for p in processes:
+            p.join()
+        tt.close()
+
+    depth, col, score = best
+    info = {"depth": depth, "nodes": nodes, "time_ms": (time.perf_counter() - start) * 1000, "score": score,
+            "workers": workers, "depth_times_ms": depth_times}
+    return col, score, info
+
+#Lazy SMP counterpart of bot_move
+def lazy_smp_bot_move(board, workers=None, time_budget_ms=None, max_depth=None, info=None):
+    col, _, result = lazy_smp_search(board_to_bitboard(board, BOT_PIECE), workers, max_depth, time_budget_ms)
+    if info is not None:
+        info.update(result)
+    return col
+
+#Fixed positions (column digits, player first) for the time-to-depth benchmark
+BENCH_POSITIONS = ["", "33", "3324", "332415", "3332244", "21433512"]
+
+#Time for each worker count until some worker finishes depth, summed over the positions
+def benchmark_lazy_smp(positions=BENCH_POSITIONS, depth=8, worker_counts=(1, 2, 4, 8, 16)):
+    rows = []
+    for workers in worker_counts:
+        total = 0.0
+        nodes = 0
+        for moves in positions:
+            _, _, info = lazy_smp_search(bb_from_moves(moves), workers, max_depth=depth)
+            total += info["depth_times_ms"][info["depth"]]
+            nodes += info["nodes"]
+        rows.append({"workers": workers, "time_to_depth_ms": total, "nodes": nodes})
+    for row in rows:
+        row["speedup"] = rows[0]["time_to_depth_ms"] / row["time_to_depth_ms"]
+    return rows
+
+if __name__ == "__main__":
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    print("cores:", os.cpu_count(), "depth:", depth)
+    for row in benchmark_lazy_smp(depth=depth):
+        print("%2d workers %10.1fms  x%.2f  %d nodes" % (row["workers"], row["time_to_depth_ms"], row["speedup"], row["nodes"]))
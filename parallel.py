@@ -0,0 +1,114 @@
+#Parallel root split search over a process pool
+#The first root move is searched alone to get a bound (young brothers wait), then the other root moves are
+#handed to the worker processes. Every move handed out later gets the best bound of the moves that finished so far,
+#so the workers share alpha (beta for a minimizing root) as they finish. The result is the same move and score as
+#the serial search at the same depth: a root move only beats the ones before it with a strictly better score,
+#and bounds taken from later columns are loosened by one point so ties still go to the earlier column
+import concurrent.futures
+import math
+import os
+import sys
+import time
+
+from engine import BOT_PIECE, Search, BitBoard, bb_alignment, bb_drop_piece, bb_from_moves, bb_is_valid_location, board_to_bitboard
+
+#Runs in a worker process: searches one root move with the window it was given
+def search_root_move(state, col, depth, alpha, beta, ordering):
+    bb = BitBoard(*state)
+    is_max = bb.to_move == BOT_PIECE
+    bb_drop_piece(bb, col)
+    search = Search(ordering=ordering)
+    _, score = search.minimax(bb, depth - 1, alpha, beta, not is_max)
+    return col, score, search.nodes
+
+#Returns (col, score, nodes) for the root position bb searched to depth
+def parallel_minimax(bb, depth, executor, workers, ordering=()):
+    is_max = bb.to_move == BOT_PIECE
+    search = Search(ordering=ordering)
+    all_plays = [c for c in search.columns if bb_is_valid_location(bb, c)]
+    if depth <= 1 or len(all_plays) < 2 or bb_alignment(bb.current) or bb_alignment(bb.current ^ bb.mask):
+        col, score = search.minimax(bb.copy(), depth, -math.inf, math.inf, is_max)
+        return col, score, search.nodes
+
+    state = (bb.current, bb.mask, bb.moves, bb.to_move)
+    _, first_score, nodes = search_root_move(state, all_plays[0], depth, -math.inf, math.inf, ordering)
+    scores = {all_plays[0]: first_score}
+
+    #Best bound for a root move from the scores in so far
+    def shared_bound(col):
+        index = all_plays.index(col)
+        if is_max:
+            return max(s if all_plays.index(c) < index else s - 1 for c, s in scores.items())
+        return min(s if all_plays.index(c) < index else s + 1 for c, s in scores.items())
+
+    pending = all_plays[1:]
+    running = set()
+    while pending or running:
+        while pending and len(running) < workers:
+            col = pending.pop(0)
+            bound = shared_bound(col)
+            alpha, beta = (bound, math.inf) if is_max else (-math.inf, bound)
+            running.add(executor.submit(search_root_move, state, col, depth, alpha, beta, ordering))
+        done, running = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            col, score, child_nodes = future.result()
+            scores[col] = score
+            nodes += child_nodes
+
+    best_col, v = all_plays[0], first_score
+    for col in all_plays[1:]:
+        if (scores[col] > v) if is_max else (scores[col] < v):
+            best_col, v = col, scores[col]
+    return best_col, v, nodes
+
+#Parallel counterpart of bot_move at a fixed depth. Pass an executor to reuse a pool between moves,
+#otherwise one with workers processes (default: one per core) is started for the call
+def parallel_bot_move(board, depth=4, workers=None, executor=None, info=None, ordering=()):
+    workers = workers or os.cpu_count() or 1
+    own_executor = executor is None
+    if own_executor:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+    try:
+        start = time.perf_counter()
+        col, score, nodes = parallel_minimax(board_to_bitboard(board, BOT_PIECE), depth, executor, workers, ordering)
+    finally:
+        if own_executor:
+            executor.shutdown()
+    if info is not None:
+        info.update({"depth": depth, "nodes": nodes, "time_ms": (time.perf_counter() - start) * 1000, "score": score, "workers": workers})
+    return col
+
+#Fixed positions (column digits, player first) used for the speedup report
+BENCH_POSITIONS = ["", "3", "33", "3324", "332415", "33243", "3332244", "21433512"]
+
+#Times the serial search and the parallel search with each worker count on the same positions,
+#checks that every parallel move matches the serial one and reports the speedup
+def benchmark_root_split(positions=BENCH_POSITIONS, depth=6, worker_counts=(1, 2, 4, 8, 16)):
+    boards = [bb_from_moves(p, BOT_PIECE) for p in positions]
+    start = time.perf_counter()
+    serial = []
+    for bb in boards:
+        search = Search()
+        serial.append(search.minimax(bb.copy(), depth, -math.inf, math.inf, bb.to_move == BOT_PIECE))
+    serial_time = time.perf_counter() - start
+
+    rows = [{"workers": 0, "time_s": serial_time, "speedup": 1.0}]
+    for workers in worker_counts:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            #Start the worker processes before timing
+            list(executor.map(abs, range(workers)))
+            start = time.perf_counter()
+            for bb, expected in zip(boards, serial):
+                col, score, _ = parallel_minimax(bb, depth, executor, workers)
+                if (col, score) != expected:
+                    raise AssertionError("Parallel search disagrees with serial search: %r != %r" % ((col, score), expected))
+            elapsed = time.perf_counter() - start
+        rows.append({"workers": workers, "time_s": elapsed, "speedup": serial_time / elapsed})
+    return rows
+
+if __name__ == "__main__":
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    print("cores:", os.cpu_count(), "depth:", depth)
+    for row in benchmark_root_split(depth=depth):
+        name = "serial" if row["workers"] == 0 else "%d workers" % row["workers"]
+        print("%-11s %8.3fs  x%.2f" % (name, row["time_s"], row["speedup"]))
@@ -0,0 +1,181 @@
+#Perfect play solver: proves the game theoretic value of a position instead of estimating it
+#Negamax with alpha-beta on the bitboard (position of the player to move + mask), a transposition table of bounds,
+#and a null window driver that narrows [min, max] with one-point window searches.
+#It only plays non-losing moves (blocks forced wins, never plays under an opponent threat)
+#and tries first the moves that create the most threats, center columns breaking ties.
+#
+#Scores are from the point of view of the player to move: positive wins, negative loses, 0 is a draw.
+#The size of the score tells how soon: a win on ply P of the game (counting every stone on the board) scores
+#(ROWS * COLS + 2 - P) // 2, so faster wins score higher and slower losses score closer to 0
+import sys
+import time
+
+from engine import (BB_TOP, CENTER_ORDER, COLS, ROWS, TT_LOWER, TT_UPPER, SearchTimeout, bb_column_mask, bb_from_moves,
+                    bb_mover_key, bb_non_losing_moves, bb_playable_cells, bb_winning_cells, next_prime)
+
+CELLS = ROWS * COLS
+COLUMN_MASKS = [bb_column_mask(c) for c in range(COLS)]
+
+#Converts a solver score into ("win" | "loss" | "draw", plies until the game ends with best play)
+def score_to_result(score, moves):
+    if score == 0:
+        return "draw", CELLS - moves
+    plies = CELLS + 2 - 2 * abs(score) - moves
+    return ("win" if score > 0 else "loss"), plies
+
+#Bound table for the solver: one (key, score, flag) slot per index, always replaced. Empty slots have key -1,
+#which no position has (0 is the empty board)
+#The solver probes it at every node, so it is kept as plain lists rather than entry tuples
+class SolverTable:
+    def __init__(self, max_entries=1 << 21):
+        self.size = next_prime(max_entries)
+        self.keys = [-1] * self.size
+        self.values = [0] * self.size
+        self.hits = 0
+        self.misses = 0
+
+    #Returns (score, flag) or None
+    def probe(self, key):
+        i = key % self.size
+        if self.keys[i] == key:
+            self.hits += 1
+            return self.values[i]
+        self.misses += 1
+        return None
+
+    def store(self, key, score, flag):
+        i = key % self.size
+        self.keys[i] = key
+        self.values[i] = (score, flag)
+
+#With a deadline (a time.perf_counter() value) the search raises SearchTimeout once it has passed, checked every 1024 nodes
+class Solver:
+    def __init__(self, tt=None, deadline=None):
+        self.tt = tt if tt is not None else SolverTable()
+        self.deadline = deadline
+        self.nodes = 0
+
+    #Alpha-beta negamax, returns the exact score when it lies in (alpha, beta), otherwise a bound on the same side
+    def negamax(self, position, mask, moves, alpha, beta):
+        self.nodes += 1
+        if self.nodes & 1023 == 0 and self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+        candidates = bb_non_losing_moves(position, mask)
+        if candidates == 0:
+            return -((CELLS - moves) // 2)
+        if moves >= CELLS - 2:
+            return 0
+
+        #The opponent cannot win on the next ply (that was checked above), so the score has a floor
+        low = -((CELLS - 2 - moves) // 2)
+        if alpha < low:
+            alpha = low
+            if alpha >= beta:
+                return alpha
+        #We cannot win on the next ply either (the caller made sure), so there is a ceiling as well
+        high = (CELLS - 1 - moves) // 2
+        if beta > high:
+            beta = high
+            if alpha >= beta:
+                return beta
+
+        #A position and its mirror image have the same score, so they share the smaller of the two keys
+        key = bb_mover_key(position, mask)[0]
+        entry = self.tt.probe(key)
+        if entry is not None:
+            value, flag = entry
+            if flag == TT_LOWER:
+                if alpha < value:
+                    alpha = value
+                    if alpha >= beta:
+                        return alpha
+            elif beta > value:
+                beta = value
+                if alpha >= beta:
+                    return beta
+
+        #Order moves by how many winning cells they leave us, center first on ties
+        if candidates & (candidates - 1) == 0:
+            ordered = [candidates]
+        else:
+            scored = []
+            for col in CENTER_ORDER:
+                move = candidates & COLUMN_MASKS[col]
+                if move:
+                    scored.append((bb_winning_cells(position | move, mask).bit_count(), move))
+            scored.sort(key=lambda item: -item[0])
+            ordered = [move for _, move in scored]
+
+        for move in ordered:
+            #Play the move: the opponent becomes the player to move
+            score = -self.negamax(position ^ mask, mask | move, moves + 1, -beta, -alpha)
+            if score >= beta:
+                self.tt.store(key, score, TT_LOWER)
+                return score
+            if score > alpha:
+                alpha = score
+        self.tt.store(key, alpha, TT_UPPER)
+        return alpha
+
+    #Exact score of the position for the player to move
+    def solve(self, bb):
+        position, mask, moves = bb.current, bb.mask, bb.moves
+        if bb_winning_cells(position, mask) & bb_playable_cells(mask):
+            return (CELLS + 1 - moves) // 2
+        low = -((CELLS - moves) // 2)
+        high = (CELLS + 1 - moves) // 2
+        #Null window searches, biased towards 0 first since most positions are close to a draw
+        while low < high:
+            med = low + (high - low) // 2
+            if med <= 0 and int(low / 2) < med:
+                med = int(low / 2)
+            elif med >= 0 and int(high / 2) > med:
+                med = int(high / 2)
+            r = self.negamax(position, mask, moves, med, med + 1)
+            if r <= med:
+                high = r
+            else:
+                low = r
+        return low
+
+    #Best column and the position score: the first move (center first) whose child proves the score.
+    #(None, 0) on a full board
+    def best_move(self, bb):
+        position, mask, moves = bb.current, bb.mask, bb.moves
+        playable = [c for c in CENTER_ORDER if mask & BB_TOP[c] == 0]
+        if not playable:
+            return None, 0
+        win = bb_winning_cells(position, mask) & bb_playable_cells(mask)
+        for col in playable:
+            if win & COLUMN_MASKS[col]:
+                return col, (CELLS + 1 - moves) // 2
+        score = self.solve(bb)
+        for col in playable:
+            move = bb_playable_cells(mask) & COLUMN_MASKS[col]
+            child_position, child_mask = position ^ mask, mask | move
+            if bb_winning_cells(child_position, child_mask) & bb_playable_cells(child_mask):
+                #The opponent wins right away after this move
+                value = -((CELLS - moves) // 2)
+            else:
+                #A child score <= -score is enough to know this move keeps the score
+                value = -self.negamax(child_position, child_mask, moves + 1, -score, -score + 1)
+            if value >= score:
+                return col, score
+        return playable[0], score
+
+def solve(bb, tt=None):
+    return Solver(tt).solve(bb)
+
+def solve_best_move(bb, tt=None):
+    return Solver(tt).best_move(bb)
+
+if __name__ == "__main__":
+    #python solver.py 3342... solves the position after those column digits
+    moves = sys.argv[1] if len(sys.argv) > 1 else ""
+    bb = bb_from_moves(moves)
+    solver = Solver()
+    start = time.perf_counter()
+    col, score = solver.best_move(bb)
+    elapsed = time.perf_counter() - start
+    result, plies = score_to_result(score, bb.moves)
+    print("best column %d, score %d (%s in %d plies), %d nodes, %.3fs" % (col, score, result, plies, solver.nodes, elapsed))
@@ -0,0 +1,45 @@
+#Tests for batch_eval.py, run with python -m pytest. Skipped when NumPy is not installed
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from batch_eval import batch_position_evaluation, batch_winning_move
+from engine import (BOT_PIECE, COLS, PLAYER_PIECE, ROWS, create_board, get_next_open_row, is_valid_location,
+                    position_evaluation, winning_move)
+
+#Boards from random games, up to max_plies stones each. A game stops once it is won so some boards hold a win
+def random_boards(count, seed, max_plies=42):
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(count):
+        board = create_board()
+        piece = PLAYER_PIECE
+        for _ in range(rng.randint(0, max_plies)):
+            col = rng.choice([c for c in range(COLS) if is_valid_location(board, c)])
+            board[get_next_open_row(board, col)][col] = piece
+            if winning_move(board, piece):
+                break
+            piece = BOT_PIECE if piece == PLAYER_PIECE else PLAYER_PIECE
+        boards.append(board)
+    return boards
+
+#Cells filled at random without gravity or turn order, boards no game can reach but the functions still score
+def unreachable_boards(count, seed):
+    rng = random.Random(seed)
+    return [[[rng.choice((0, PLAYER_PIECE, BOT_PIECE)) for _ in range(COLS)] for _ in range(ROWS)]
+            for _ in range(count)]
+
+#Every board of a batch gets the same score and win check as on its own, whatever the chunk size
+def test_batch_matches_single_boards():
+    boards = random_boards(50, seed=12) + unreachable_boards(50, seed=12)
+    for chunk_size in (7, 65536):
+        for piece in (BOT_PIECE, PLAYER_PIECE):
+            scores = batch_position_evaluation(boards, piece, chunk_size)
+            assert scores.tolist() == [position_evaluation(board, piece) for board in boards]
+            wins = batch_winning_move(boards, piece, chunk_size)
+            assert wins.tolist() == [bool(winning_move(board, piece)) for board in boards]
+    #Make sure both answers came up
+    wins = batch_winning_move(boards, PLAYER_PIECE)
+    assert wins.any() and not wins.all()
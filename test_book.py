@@ -0,0 +1,29 @@
+#Tests for book.py, run with python -m pytest
+from book import OpeningBook, build_book, enumerate_positions
+from engine import BitBoard, bb_alignment, bb_drop_piece, bb_from_moves, bb_mirror, mirror_col
+from solver import Solver
+
+#A few plies from a late position, so the pure Python solver builds it in about a second
+ROOT = "4344332256562"
+
+def mirrored(bb):
+    return BitBoard(bb_mirror(bb.current), bb_mirror(bb.mask), bb.moves, bb.to_move)
+
+#Mirror images share one record: both find it, with the column mirrored, and the column keeps the score
+def test_lookup_of_mirror_images(tmp_path):
+    path = str(tmp_path / "book.bin")
+    build_book(path, 1, ROOT)
+    solver = Solver()
+    with OpeningBook(path) as book:
+        positions = enumerate_positions(bb_from_moves(ROOT), 1)
+        assert len(book) == len(positions)
+        for bb in positions:
+            col, score = book.lookup(bb)
+            assert book.lookup(mirrored(bb)) == (mirror_col(col), score)
+            child = bb.copy()
+            bb_drop_piece(child, col)
+            if not bb_alignment(child.current ^ child.mask):
+                assert -solver.solve(child) == score
+        #The root is not solved but backed up from its children
+        assert book.lookup(positions[0])[1] == solver.solve(positions[0])
+        assert book.lookup(bb_from_moves("3")) is None
@@ -0,0 +1,303 @@
+#Tests for engine.py and solver.py, run with python -m pytest
+import io
+import json
+import math
+import random
+import time
+
+import pytest
+
+from engine import (BOT_PIECE, COLS, ORDER_ALL, PLAYER_PIECE, ROWS, BitBoard, Board, IncrementalEvaluator, Search,
+                    SearchStats, SearchTimeout, TracingSearch, TranspositionTable, bb_alignment, bb_canonical_key,
+                    bb_drop_piece, bb_from_moves, bb_iterative_deepening, bb_minimax, bb_mirror,
+                    bb_position_evaluation, bb_root_scores, bitboard_to_board, board_to_bitboard, bot_move,
+                    create_board, get_next_open_row, is_valid_location, minimax, minimax_in_place, mirror_col,
+                    position_evaluation, winner, winning_move, winning_move_at)
+from solver import Solver
+
+#Column digits of a game that fills the board without four in a row
+DRAWN_GAME = "361313645534311043046626105524515600224220"
+
+#Random positions that are still going, count of them from a fixed seed, up to max_plies stones each.
+#Positions with either side to move are kept, the tests search them for both sides anyway
+def random_positions(count, seed=1, max_plies=30):
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = create_board()
+        piece = PLAYER_PIECE
+        for _ in range(rng.randint(0, max_plies)):
+            col = rng.choice([c for c in range(COLS) if is_valid_location(board, c)])
+            board[get_next_open_row(board, col)][col] = piece
+            if winning_move(board, piece):
+                break
+            piece = BOT_PIECE if piece == PLAYER_PIECE else PLAYER_PIECE
+        else:
+            positions.append(board)
+    return positions
+
+#minimax_in_place plays on the board it is given, so it has to find the same move and score as minimax
+#and hand the board back exactly as it was
+def test_minimax_in_place_matches_minimax():
+    for board in [create_board()] + random_positions(40, seed=3, max_plies=38):
+        for depth in range(1, 5):
+            for is_max in (True, False):
+                before = [row[:] for row in board]
+                expected = minimax(board, depth, -math.inf, math.inf, is_max)
+                assert minimax_in_place(board, depth, -math.inf, math.inf, is_max) == expected
+                assert board == before
+
+#The lean bitboard search has to find the same move and score as minimax, the evaluation the same score
+def test_bb_minimax_matches_minimax():
+    for board in [create_board()] + random_positions(40, seed=4, max_plies=38):
+        for piece in (BOT_PIECE, PLAYER_PIECE):
+            assert bb_position_evaluation(board_to_bitboard(board), piece) == position_evaluation(board, piece)
+        for depth in range(0, 5):
+            for is_max in (True, False):
+                bb = board_to_bitboard(board, BOT_PIECE if is_max else PLAYER_PIECE)
+                expected = minimax([row[:] for row in board], depth, -math.inf, math.inf, is_max)
+                assert bb_minimax(bb.copy(), depth, -math.inf, math.inf, is_max) == expected
+                #With a table the search goes through Search, which has to agree
+                tt = TranspositionTable(1 << 12)
+                assert bb_minimax(bb.copy(), depth, -math.inf, math.inf, is_max, tt)[1] == expected[1]
+    #Finished games are scored at the root
+    assert bb_minimax(bb_from_moves("0101010", BOT_PIECE), 4, -math.inf, math.inf, False) == (None, 112400)
+    #The side to move decides which stones are played, is_max cannot contradict it
+    with pytest.raises(ValueError):
+        bb_minimax(bb_from_moves("3", PLAYER_PIECE), 2, -math.inf, math.inf, False)
+
+#Checking only the lines through the last stone gives the same answer as checking the whole board,
+#as long as nobody had won before it, which random_positions makes sure of
+def test_winning_move_at():
+    outcomes = set()
+    for board in random_positions(60, seed=13, max_plies=38):
+        for col in range(COLS):
+            if not is_valid_location(board, col):
+                continue
+            row = get_next_open_row(board, col)
+            for piece in (BOT_PIECE, PLAYER_PIECE):
+                other = PLAYER_PIECE if piece == BOT_PIECE else BOT_PIECE
+                board[row][col] = piece
+                won = winning_move_at(board, row, col, piece)
+                assert won == bool(winning_move(board, piece))
+                assert winning_move_at(board, row, col, other) is False
+                assert winner(board, (row, col)) == winner(board) == (piece if won else 0)
+                outcomes.add(won)
+                board[row][col] = 0
+    assert outcomes == {True, False}
+    #An empty cell is nobody's
+    assert winner(create_board(), (0, 3)) == 0
+
+#The incremental scores have to match a full evaluation after every stone played and taken back
+def test_incremental_evaluator():
+    rng = random.Random(11)
+    for board in [create_board()] + random_positions(20, seed=11):
+        board = [row[:] for row in board]
+        evaluator = IncrementalEvaluator(board)
+        played = []
+        piece = rng.choice((BOT_PIECE, PLAYER_PIECE))
+        for _ in range(rng.randint(1, 12)):
+            cols = [c for c in range(COLS) if is_valid_location(board, c)]
+            if not cols:
+                break
+            col = rng.choice(cols)
+            row = get_next_open_row(board, col)
+            board[row][col] = piece
+            evaluator.play(row, col, piece)
+            played.append((row, col, piece))
+            for p in (BOT_PIECE, PLAYER_PIECE):
+                assert evaluator.score(p) == position_evaluation(board, p)
+            piece = BOT_PIECE if piece == PLAYER_PIECE else PLAYER_PIECE
+        for row, col, piece in reversed(played):
+            board[row][col] = 0
+            evaluator.undo(row, col, piece)
+            for p in (BOT_PIECE, PLAYER_PIECE):
+                assert evaluator.score(p) == position_evaluation(board, p)
+
+#The threat pass only skips moves that are won or lost anyway, so the score stays the same with or without it,
+#whatever table and ordering the search uses
+def test_threats_keep_the_score():
+    for board in [create_board()] + random_positions(30, seed=10, max_plies=38):
+        for is_max in (True, False):
+            bb = board_to_bitboard(board, BOT_PIECE if is_max else PLAYER_PIECE)
+            for depth in range(1, 6):
+                for use_tt, ordering in ((False, ()), (True, ()), (False, ORDER_ALL), (True, ORDER_ALL)):
+                    scores = []
+                    for threats in (False, True):
+                        tt = TranspositionTable(1 << 12) if use_tt else None
+                        search = Search(tt, ordering=ordering, threats=threats)
+                        scores.append(search.minimax(bb.copy(), depth, -math.inf, math.inf, is_max)[1])
+                    assert scores[0] == scores[1]
+
+#Mirror image of a position about the center column
+def mirrored(bb):
+    return BitBoard(bb_mirror(bb.current), bb_mirror(bb.mask), bb.moves, bb.to_move)
+
+def is_symmetric(bb):
+    return bb_mirror(bb.current) == bb.current and bb_mirror(bb.mask) == bb.mask
+
+def test_mirror():
+    bb = bb_from_moves("0123445")
+    mirror = mirrored(bb)
+    expected = bb_from_moves("6543221")
+    assert (mirror.current, mirror.mask) == (expected.current, expected.mask)
+    assert mirrored(mirror).current == bb.current and mirrored(mirror).mask == bb.mask
+    assert [mirror_col(c) for c in range(COLS)] == list(reversed(range(COLS)))
+    key, flipped = bb_canonical_key(bb)
+    mirror_key, mirror_flipped = bb_canonical_key(mirror)
+    assert key == mirror_key and flipped != mirror_flipped
+
+#Ties between equally good columns are broken in column order, so a mirrored position does not always get
+#the mirrored column back. What holds is that both positions get the same score and that the column chosen
+#for the mirror image, mirrored back, scores as well as the best move of the original position
+def test_mirrored_positions_score_the_same():
+    for board in random_positions(30, seed=5):
+        for to_move in (BOT_PIECE, PLAYER_PIECE):
+            bb = board_to_bitboard(board, to_move)
+            col, score, _ = bb_iterative_deepening(bb.copy(), 10 ** 9, max_depth=4)
+            mirror_col_found, mirror_score, _ = bb_iterative_deepening(mirrored(bb), 10 ** 9, max_depth=4)
+            assert mirror_score == score
+            scores = bb_root_scores(bb, 4)
+            assert scores[col] == score
+            assert scores[mirror_col(mirror_col_found)] == score
+
+#An exact transposition table entry stored for a position answers its mirror image with the mirrored column
+def test_tt_entries_are_shared_with_the_mirror_image():
+    for board in random_positions(30, seed=6):
+        bb = board_to_bitboard(board, BOT_PIECE)
+        if is_symmetric(bb):
+            continue
+        tt = TranspositionTable(1 << 16)
+        col, score = Search(tt, ordering=ORDER_ALL).minimax(bb.copy(), 4, -math.inf, math.inf, True)
+        search = Search(tt, ordering=ORDER_ALL)
+        assert search.minimax(mirrored(bb), 4, -math.inf, math.inf, True) == (mirror_col(col), score)
+        assert search.nodes == 1
+
+#The solver shares its table entries between mirror images, the score must not change and the move it picks
+#for the mirror image, mirrored back, must keep that score in the original position
+def test_solver_mirror():
+    solver = Solver()
+    #Late positions only, the pure Python solver takes seconds on earlier ones
+    positions = [board for board in random_positions(200, seed=7, max_plies=34)
+                 if sum(cell != 0 for row in board for cell in row) >= 26]
+    assert positions
+    for board in positions:
+        bb = board_to_bitboard(board, BOT_PIECE)
+        score = solver.solve(bb)
+        col, mirror_score = solver.best_move(mirrored(bb))
+        assert mirror_score == score
+        child = bb.copy()
+        bb_drop_piece(child, mirror_col(col))
+        if bb_alignment(child.current ^ child.mask):
+            #Won on the spot, solve only scores positions where the game is still going
+            assert score == (ROWS * COLS + 1 - bb.moves) // 2
+        else:
+            assert -solver.solve(child) == score
+
+#The empty board cannot be solved in time, so the solver has to give up and leave the rest of the budget to the search
+def test_solver_respects_the_time_budget():
+    info = {}
+    start = time.perf_counter()
+    col = bot_move(create_board(), 300, info=info, solver_stones=0)
+    assert time.perf_counter() - start < 1.0
+    assert info["solver_timed_out"] and "solved" not in info
+    assert 0 <= col < COLS
+
+#A game that is over is not handed to the solver: bot_move has no move for it, like the search
+def test_solver_skips_finished_games():
+    won = bitboard_to_board(bb_from_moves("0102030"))
+    info = {}
+    assert bot_move(won, info=info, solver_stones=0) is None
+    assert "solved" not in info
+    #A drawn game with every column full
+    full = bb_from_moves(DRAWN_GAME)
+    assert full.moves == ROWS * COLS
+    assert Solver().best_move(full) == (None, 0)
+    info = {}
+    assert bot_move(bitboard_to_board(full), info=info, solver_stones=0) is None
+    assert "solved" not in info
+
+#Every iteration records its own nodes and time next to the running totals
+def test_iteration_stats():
+    stats = SearchStats()
+    _, _, info = bb_iterative_deepening(bb_from_moves("33243"), 10 ** 9, max_depth=6, stats=stats)
+    total_nodes, total_ms = 0, 0.0
+    for iteration in stats.iterations:
+        total_nodes += iteration["nodes"]
+        total_ms += iteration["time_ms"]
+        assert iteration["cumulative_nodes"] == total_nodes
+        assert iteration["cumulative_time_ms"] >= total_ms
+    assert len(stats.iterations) == 6
+    assert total_nodes == info["nodes"] == stats.nodes
+
+#Board keeps the same cells as the nested lists through drops and take backs, and refuses moves that do not fit
+def test_board():
+    for board in random_positions(20, seed=8):
+        compact = Board.from_list(board)
+        assert compact.to_list() == board
+        for col in compact.valid_moves():
+            row = compact.drop(col, BOT_PIECE)
+            assert row == get_next_open_row(board, col)
+            compact.undo(col)
+            assert compact.to_list() == board
+    compact = Board()
+    with pytest.raises(ValueError):
+        compact.undo(3)
+    assert compact.key() == bytes(ROWS * COLS)
+    for _ in range(ROWS):
+        compact.drop(0, PLAYER_PIECE)
+    with pytest.raises(ValueError):
+        compact.drop(0, PLAYER_PIECE)
+
+#The line starts with the move played and stays legal, the root scores agree with the score of the move
+def test_bot_move_pv_and_root_scores():
+    for board in random_positions(10, seed=9):
+        info = {}
+        col = bot_move([row[:] for row in board], info=info, root_scores=True)
+        assert info["pv"][0] == col
+        played, piece = [row[:] for row in board], BOT_PIECE
+        for move in info["pv"]:
+            assert is_valid_location(played, move)
+            played[get_next_open_row(played, move)][move] = piece
+            piece = PLAYER_PIECE if piece == BOT_PIECE else BOT_PIECE
+        assert info["root_scores_depth"] == info["depth"]
+        assert info["root_scores"][col] == max(info["root_scores"].values()) == info["score"]
+    #With a budget the root scores are charged to it
+    info = {}
+    start = time.perf_counter()
+    bot_move(create_board(), 300, info=info, root_scores=True)
+    assert time.perf_counter() - start < 0.6
+    assert 1 <= info["root_scores_depth"] <= info["depth"]
+    assert sorted(info["root_scores"]) == list(range(COLS))
+
+#Every traced node is written once its search is done: children come before their parent, one ply deeper
+def test_trace():
+    out = io.StringIO()
+    info = {}
+    col = bot_move(create_board(), info=info, trace=out, trace_depth=2)
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    written = {}
+    for record in records:
+        assert record["id"] not in written
+        written[record["id"]] = record
+        assert record["ply"] <= 2
+    for record in records:
+        if record["parent"] is None:
+            assert record["ply"] == 0
+        else:
+            parent = written[record["parent"]]
+            assert records.index(parent) > records.index(record)
+            assert record["ply"] == parent["ply"] + 1
+    root = records[-1]
+    assert root["parent"] is None and root["best"] == col and root["score"] == info["score"]
+    assert root["nodes"] == info["nodes"]
+    #Nodes still open when the search is stopped are never written, the ones finished before are
+    out = io.StringIO()
+    search = TracingSearch(out, 5, stop=lambda: True, threats=True)
+    with pytest.raises(SearchTimeout):
+        search.minimax(bb_from_moves(""), 8, -math.inf, math.inf, True)
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert records
+    written = {record["id"] for record in records}
+    assert 0 not in written
+    assert any(record["parent"] not in written for record in records)
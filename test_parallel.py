@@ -0,0 +1,22 @@
+#Tests for parallel.py, run with python -m pytest
+import concurrent.futures
+import math
+
+from engine import BOT_PIECE, ORDER_ALL, PLAYER_PIECE, Search, bb_from_moves
+from parallel import BENCH_POSITIONS, parallel_minimax
+
+#Openings from the speedup report and a few later positions, column digits
+POSITIONS = BENCH_POSITIONS + ["5446132545441", "451600334234435", "404362465434353613515014211"]
+
+#The root split has to find the same move and score as the serial search, for either side to move
+def test_parallel_minimax_matches_search():
+    with concurrent.futures.ProcessPoolExecutor(max_workers=2) as executor:
+        for moves in POSITIONS:
+            for first in (BOT_PIECE, PLAYER_PIECE):
+                bb = bb_from_moves(moves, first)
+                is_max = bb.to_move == BOT_PIECE
+                for depth in (2, 4):
+                    for ordering in ((), ORDER_ALL):
+                        expected = Search(ordering=ordering).minimax(bb.copy(), depth, -math.inf, math.inf, is_max)
+                        col, score, _ = parallel_minimax(bb, depth, executor, 2, ordering)
+                        assert (col, score) == expected